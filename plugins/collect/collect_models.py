@@ -32,8 +32,9 @@ class CollectModels(pyblish.api.ContextPlugin):
         scene_name = get_scene_name()
         print(f"[Collect Models] Scene: {scene_name}")
         
-        # Get all mesh objects in the scene
+        # Get all mesh objects in the scene (shared with later plugins via context)
         meshes = get_meshes()
+        context.data["scene_meshes"] = meshes
         print(f"[Collect Models] Found {len(meshes)} mesh objects")
         
         if not meshes:
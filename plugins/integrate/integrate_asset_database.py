@@ -394,9 +394,10 @@ class IntegrateAssetDatabase(pyblish.api.InstancePlugin):
             return os.path.getsize(path) / (1024 * 1024)
         elif os.path.isdir(path):
             total_size = 0
+            sep = os.sep
             for root, dirs, files in os.walk(path):
                 for file in files:
-                    file_path = os.path.join(root, file)
+                    file_path = f"{root}{sep}{file}"
                     total_size += os.path.getsize(file_path)
             return total_size / (1024 * 1024)
         return 0
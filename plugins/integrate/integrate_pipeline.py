@@ -378,9 +378,10 @@ Completion Time: {summary['completion_date']}
             return os.path.getsize(path) / (1024 * 1024)
         elif os.path.isdir(path):
             total_size = 0
+            sep = os.sep
             for root, dirs, files in os.walk(path):
                 for file in files:
-                    file_path = os.path.join(root, file)
+                    file_path = f"{root}{sep}{file}"
                     try:
                         total_size += os.path.getsize(file_path)
                     except OSError:
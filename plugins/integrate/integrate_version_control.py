@@ -92,9 +92,10 @@ class IntegrateVersionControl(pyblish.api.InstancePlugin):
                         exported_files.append(path)
                     elif os.path.isdir(path):
                         # Add all files in directory
+                        sep = os.sep
                         for root, dirs, files in os.walk(path):
                             for file in files:
-                                file_path = os.path.join(root, file)
+                                file_path = f"{root}{sep}{file}"
                                 exported_files.append(file_path)
         
         # Check for extracted textures
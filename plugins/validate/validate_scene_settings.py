@@ -8,12 +8,25 @@ It checks units, frame rates, render settings, and other scene properties.
 import pyblish.api
 import sys
 import os
+from collections import namedtuple
 
 # Add utils to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 from utils.maya_utils import get_scene_units, get_fps, get_frame_range
 from config.settings import DEFAULT_PLUGIN_ORDERS
 
+# Render settings already validated per saved scene: {(scene_path, mtime): (renderer, format, width, height)}
+_RENDER_SETTINGS_CACHE = {}
+
+# Expected scene settings structure
+ExpectedSettings = namedtuple('ExpectedSettings', [
+    'linear_unit',
+    'angular_unit',
+    'time_unit',
+    'fps',
+    'min_frame_range',
+])
+
 
 class ValidateSceneSettings(pyblish.api.ContextPlugin):
     """Validate Maya scene settings for consistency."""
@@ -23,13 +36,13 @@ class ValidateSceneSettings(pyblish.api.ContextPlugin):
     hosts = ["maya"]
     
     # Expected scene settings
-    EXPECTED_SETTINGS = {
-        'linear_unit': 'cm',
-        'angular_unit': 'deg',
-        'time_unit': 'film',  # 24 fps
-        'fps': 24,
-        'min_frame_range': 10  # Minimum frame range length
-    }
+    EXPECTED_SETTINGS = ExpectedSettings(
+        linear_unit='cm',
+        angular_unit='deg',
+        time_unit='film',  # 24 fps
+        fps=24,
+        min_frame_range=10  # Minimum frame range length
+    )
     
     def process(self, context):
         """Main processing function."""
@@ -37,11 +50,17 @@ class ValidateSceneSettings(pyblish.api.ContextPlugin):
         print("[Validate Scene Settings] Validating scene settings...")
         print("="*50)
         
+        # Query units/fps once; shared with the sub-validators and later plugins
+        if "scene_units" not in context.data:
+            context.data["scene_units"] = get_scene_units()
+        if "scene_fps" not in context.data:
+            context.data["scene_fps"] = get_fps()
+        
         # Validate units
-        self.validate_units()
+        self.validate_units(context)
         
         # Validate frame rate and time settings
-        self.validate_time_settings()
+        self.validate_time_settings(context)
         
         # Validate frame range
         self.validate_frame_range()
@@ -50,16 +69,16 @@ class ValidateSceneSettings(pyblish.api.ContextPlugin):
         self.validate_render_settings()
         
         # Validate scene scale
-        self.validate_scene_scale()
+        self.validate_scene_scale(context)
         
         print("[Validate Scene Settings] PASSED: Scene settings validation completed")
         print("="*50 + "\n")
     
-    def validate_units(self):
+    def validate_units(self, context):
         """Validate scene units."""
         print("[Validate Scene Settings] Checking scene units...")
         
-        units = get_scene_units()
+        units = context.data["scene_units"]
         linear_unit = units['linear']
         angular_unit = units['angular']
         
@@ -69,12 +88,12 @@ class ValidateSceneSettings(pyblish.api.ContextPlugin):
         issues = []
         
         # Check linear unit
-        expected_linear = self.EXPECTED_SETTINGS['linear_unit']
+        expected_linear = self.EXPECTED_SETTINGS.linear_unit
         if linear_unit != expected_linear:
             issues.append(f"Linear unit is '{linear_unit}', expected '{expected_linear}'")
         
         # Check angular unit
-        expected_angular = self.EXPECTED_SETTINGS['angular_unit']
+        expected_angular = self.EXPECTED_SETTINGS.angular_unit
         if angular_unit != expected_angular:
             issues.append(f"Angular unit is '{angular_unit}', expected '{expected_angular}'")
         
@@ -85,13 +104,13 @@ class ValidateSceneSettings(pyblish.api.ContextPlugin):
         
         print("[Validate Scene Settings] Units validation passed")
     
-    def validate_time_settings(self):
+    def validate_time_settings(self, context):
         """Validate time and frame rate settings."""
         print("[Validate Scene Settings] Checking time settings...")
         
-        units = get_scene_units()
+        units = context.data["scene_units"]
         time_unit = units['time']
-        fps = get_fps()
+        fps = context.data["scene_fps"]
         
         print(f"  - Time unit: {time_unit}")
         print(f"  - FPS: {fps}")
@@ -99,12 +118,12 @@ class ValidateSceneSettings(pyblish.api.ContextPlugin):
         issues = []
         
         # Check time unit
-        expected_time_unit = self.EXPECTED_SETTINGS['time_unit']
+        expected_time_unit = self.EXPECTED_SETTINGS.time_unit
         if time_unit != expected_time_unit:
             issues.append(f"Time unit is '{time_unit}', expected '{expected_time_unit}'")
         
         # Check FPS
-        expected_fps = self.EXPECTED_SETTINGS['fps']
+        expected_fps = self.EXPECTED_SETTINGS.fps
         if fps != expected_fps:
             issues.append(f"FPS is {fps}, expected {expected_fps}")
         
@@ -126,7 +145,7 @@ class ValidateSceneSettings(pyblish.api.ContextPlugin):
         print(f"  - End frame: {end_frame}")
         print(f"  - Frame count: {frame_count}")
         
-        min_range = self.EXPECTED_SETTINGS['min_frame_range']
+        min_range = self.EXPECTED_SETTINGS.min_frame_range
         
         if frame_count < min_range:
             warning_msg = (
@@ -144,17 +163,35 @@ class ValidateSceneSettings(pyblish.api.ContextPlugin):
         try:
             import maya.cmds as cmds
             
-            # Get current renderer
-            current_renderer = cmds.getAttr("defaultRenderGlobals.currentRenderer")
-            print(f"  - Current renderer: {current_renderer}")
+            # Skip when the scene is unmodified since the same saved file was last validated
+            cache_key = None
+            scene_path = cmds.file(query=True, sceneName=True)
+            if scene_path and not cmds.file(query=True, modified=True):
+                try:
+                    cache_key = (scene_path, os.path.getmtime(scene_path))
+                except OSError:
+                    cache_key = None
+            cached = _RENDER_SETTINGS_CACHE.get(cache_key) if cache_key is not None else None
+            if cached is not None:
+                # Same saved scene as last time: reuse the values, skip the getAttr calls
+                current_renderer, image_format, width, height = cached
+                print("  - Render settings unchanged since last validation (cached)")
+            else:
+                # Get current renderer
+                current_renderer = cmds.getAttr("defaultRenderGlobals.currentRenderer")
+                
+                # Check image format
+                image_format = cmds.getAttr("defaultRenderGlobals.imageFormat")
+                
+                # Check resolution
+                width = cmds.getAttr("defaultResolution.width")
+                height = cmds.getAttr("defaultResolution.height")
+                
+                if cache_key is not None:
+                    _RENDER_SETTINGS_CACHE[cache_key] = (current_renderer, image_format, width, height)
             
-            # Check image format
-            image_format = cmds.getAttr("defaultRenderGlobals.imageFormat")
+            print(f"  - Current renderer: {current_renderer}")
             print(f"  - Image format: {image_format}")
-            
-            # Check resolution
-            width = cmds.getAttr("defaultResolution.width")
-            height = cmds.getAttr("defaultResolution.height")
             print(f"  - Resolution: {width}x{height}")
             
             # Validate common issues
@@ -179,7 +216,7 @@ class ValidateSceneSettings(pyblish.api.ContextPlugin):
         except Exception as e:
             print(f"[Validate Scene Settings] Could not validate render settings: {e}")
     
-    def validate_scene_scale(self):
+    def validate_scene_scale(self, context):
         """Validate scene scale and object sizes."""
         print("[Validate Scene Settings] Checking scene scale...")
         
@@ -187,7 +224,11 @@ class ValidateSceneSettings(pyblish.api.ContextPlugin):
             import maya.cmds as cmds
             from utils.maya_utils import get_meshes
             
-            meshes = get_meshes()
+            # Reuse the mesh list gathered earlier in this context (fresh context per reset)
+            meshes = context.data.get("scene_meshes")
+            if meshes is None:
+                meshes = get_meshes()
+                context.data["scene_meshes"] = meshes
             if not meshes:
                 print("  - No meshes found to validate scale")
                 return
@@ -209,14 +250,14 @@ class ValidateSceneSettings(pyblish.api.ContextPlugin):
                         # Check for very large objects (> 1000 units)
                         if max_dimension > 1000:
                             very_large_objects.append({
-                                'mesh': mesh.split('|')[-1],
+                                'mesh': mesh.rpartition('|')[2],
                                 'size': max_dimension
                             })
                         
                         # Check for very small objects (< 0.01 units)
                         elif max_dimension < 0.01:
                             very_small_objects.append({
-                                'mesh': mesh.split('|')[-1],
+                                'mesh': mesh.rpartition('|')[2],
                                 'size': max_dimension
                             })
                 except:
@@ -226,16 +267,14 @@ class ValidateSceneSettings(pyblish.api.ContextPlugin):
             warnings = []
             
             if very_large_objects:
-                warning = "Very large objects detected (>1000 units):\n"
-                for obj in very_large_objects:
-                    warning += f"  - {obj['mesh']}: {obj['size']:.2f} units\n"
-                warnings.append(warning)
+                lines = ["Very large objects detected (>1000 units):"]
+                lines.extend(f"  - {obj['mesh']}: {obj['size']:.2f} units" for obj in very_large_objects)
+                warnings.append("\n".join(lines) + "\n")
             
             if very_small_objects:
-                warning = "Very small objects detected (<0.01 units):\n"
-                for obj in very_small_objects:
-                    warning += f"  - {obj['mesh']}: {obj['size']:.4f} units\n"
-                warnings.append(warning)
+                lines = ["Very small objects detected (<0.01 units):"]
+                lines.extend(f"  - {obj['mesh']}: {obj['size']:.4f} units" for obj in very_small_objects)
+                warnings.append("\n".join(lines) + "\n")
             
             if warnings:
                 warning_msg = "\n".join(warnings)
@@ -8,14 +8,23 @@ Usage:
   python scripts/sync_agent.py --server http://localhost:5000 --api-key demo-edit --root exports
 
 Dependencies: requests (optional). Falls back to urllib for GET/POST JSON, but multipart upload is best with requests.
+requests_toolbelt (optional) streams multipart uploads; orjson (optional) is used for JSON encode/decode when installed.
+Uploads carry an X-Content-Hash header (blake3 if installed, else sha256); the server skips
+files whose stored copy already has that hash.
+With aiohttp + watchdog installed, pushing and polling run concurrently on an asyncio loop.
 """
 from __future__ import annotations
 import argparse
+import asyncio
+import hashlib
+import logging
 import os
+import sys
 import time
 import json
 from pathlib import Path
-from typing import Dict, Any, List, Tuple
+from urllib.parse import urlencode
+from typing import Dict, Any, List, Optional, Tuple
 
 # Optional requests
 try:
@@ -26,52 +35,152 @@ except Exception:
     import urllib.error
     HAVE_REQUESTS = False
 
+# Optional requests_toolbelt: streams multipart bodies instead of building them in memory
+try:
+    from requests_toolbelt import MultipartEncoder  # type: ignore
+    HAVE_TOOLBELT = True
+except Exception:
+    HAVE_TOOLBELT = False
+
+# Optional aiohttp + watchdog: event-driven push concurrent with polling (needs asyncio.to_thread, 3.9+)
+try:
+    import aiohttp  # type: ignore
+    from watchdog.observers import Observer  # type: ignore
+    from watchdog.events import FileSystemEventHandler  # type: ignore
+    HAVE_ASYNC = sys.version_info >= (3, 9)
+except Exception:
+    HAVE_ASYNC = False
+
+# Optional blake3: SIMD content hashing; sha256 otherwise
+try:
+    from blake3 import blake3 as _hash_ctor  # type: ignore
+    HASH_NAME = 'blake3'
+except Exception:
+    _hash_ctor = hashlib.sha256
+    HASH_NAME = 'sha256'
+
+# Optional orjson: parses bytes directly (no intermediate decode) and is much faster than json
+try:
+    import orjson  # type: ignore
+    HAVE_ORJSON = True
+except Exception:
+    HAVE_ORJSON = False
+
+
+log = logging.getLogger("sync_agent")
+
+
+def _loads(data: bytes):
+    return orjson.loads(data) if HAVE_ORJSON else json.loads(data)
+
+
+def _dumps(obj: Any) -> bytes:
+    return orjson.dumps(obj) if HAVE_ORJSON else json.dumps(obj).encode('utf-8')
 
-def http_get_json(url: str, headers: Dict[str, str], timeout: int = 10):
+
+def _with_params(url: str, params: Optional[Dict[str, Any]]) -> str:
+    return f"{url}?{urlencode(params)}" if params else url
+
+
+def http_get_json(url: str, headers: Dict[str, str], timeout: int = 10, params: Optional[Dict[str, Any]] = None):
     try:
         if HAVE_REQUESTS:
-            r = requests.get(url, headers=headers, timeout=timeout)
-            return r.status_code, (r.json() if r.headers.get("content-type", "").startswith("application/json") else r.text)
+            r = requests.get(url, headers=headers, params=params, timeout=timeout)
+            return r.status_code, (_loads(r.content) if r.headers.get("content-type", "").startswith("application/json") else r.text)
         else:
-            req = urllib.request.Request(url, headers=headers, method='GET')
+            req = urllib.request.Request(_with_params(url, params), headers=headers, method='GET')
             with urllib.request.urlopen(req, timeout=timeout) as resp:
-                data = resp.read().decode('utf-8', errors='ignore')
-            return 200, json.loads(data)
+                data = resp.read()
+            return 200, _loads(data)
     except Exception as e:
         return 0, str(e)
 
 
+def http_get_json_conditional(url: str, headers: Dict[str, str], etag: Optional[str] = None, timeout: int = 10,
+                              params: Optional[Dict[str, Any]] = None):
+    """GET JSON with If-None-Match; returns (status, body, etag).
+    On 304 Not Modified the body is None and the previous etag is kept.
+    """
+    hdr = headers.copy()
+    if etag:
+        hdr['If-None-Match'] = etag
+    try:
+        if HAVE_REQUESTS:
+            r = requests.get(url, headers=hdr, params=params, timeout=timeout)
+            if r.status_code == 304:
+                return 304, None, etag
+            body = _loads(r.content) if r.headers.get("content-type", "").startswith("application/json") else r.text
+            return r.status_code, body, r.headers.get("ETag") or etag
+        else:
+            req = urllib.request.Request(_with_params(url, params), headers=hdr, method='GET')
+            try:
+                with urllib.request.urlopen(req, timeout=timeout) as resp:
+                    new_etag = resp.headers.get("ETag") or etag
+                    data = resp.read()
+            except urllib.error.HTTPError as e:
+                if e.code == 304:
+                    return 304, None, etag
+                raise
+            return 200, _loads(data), new_etag
+    except Exception as e:
+        return 0, str(e), etag
+
+
 def http_post_json(url: str, headers: Dict[str, str], payload: Dict[str, Any], timeout: int = 20):
     try:
         if HAVE_REQUESTS:
-            r = requests.post(url, headers=headers, json=payload, timeout=timeout)
+            hdr = headers.copy()
+            hdr['Content-Type'] = 'application/json'
+            r = requests.post(url, headers=hdr, data=_dumps(payload), timeout=timeout)
             try:
-                body = r.json()
+                body = _loads(r.content)
             except Exception:
                 body = r.text
             return r.status_code, body
         else:
-            data = json.dumps(payload).encode('utf-8')
+            data = _dumps(payload)
             hdr = headers.copy()
             hdr['Content-Type'] = 'application/json'
             req = urllib.request.Request(url, headers=hdr, data=data)
             with urllib.request.urlopen(req, timeout=timeout) as resp:
-                body = resp.read().decode('utf-8', errors='ignore')
+                body = resp.read()
             try:
-                return 200, json.loads(body)
+                return 200, _loads(body)
             except Exception:
-                return 200, body
+                return 200, body.decode('utf-8', errors='ignore')
     except Exception as e:
         return 0, str(e)
 
 
+def content_hash(file_path: str) -> str:
+    """Return '<algo>:<hexdigest>' of the file contents (sent as X-Content-Hash)."""
+    with open(file_path, 'rb') as f:
+        if hasattr(hashlib, 'file_digest'):  # Python 3.11+
+            digest = hashlib.file_digest(f, _hash_ctor).hexdigest()
+        else:
+            h = _hash_ctor()
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+            digest = h.hexdigest()
+    return f"{HASH_NAME}:{digest}"
+
+
 def post_file(url: str, headers: Dict[str, str], file_path: str, fields: Dict[str, str]):
     if not HAVE_REQUESTS:
         return 501, 'requests not available for multipart'
     try:
+        headers = headers.copy()
+        headers['X-Content-Hash'] = content_hash(file_path)
         with open(file_path, 'rb') as f:
-            files = {'file': (os.path.basename(file_path), f)}
-            r = requests.post(url, headers=headers, files=files, data=fields, timeout=60)
+            if HAVE_TOOLBELT:
+                # Body is produced lazily while sending, so large caches are never fully resident
+                enc = MultipartEncoder(fields={**fields, 'file': (os.path.basename(file_path), f, 'application/octet-stream')})
+                hdr = headers.copy()
+                hdr['Content-Type'] = enc.content_type
+                r = requests.post(url, headers=hdr, data=enc, timeout=60)
+            else:
+                files = {'file': (os.path.basename(file_path), f)}
+                r = requests.post(url, headers=headers, files=files, data=fields, timeout=60)
             try:
                 body = r.json()
             except Exception:
@@ -136,21 +245,169 @@ def apply_remote_changes(root: Path, changes: List[Dict[str, Any]]):
             pass
 
 
+# Quiet period after the last watchdog event before a file is uploaded;
+# on_modified fires on every write, so uploading immediately would send partial files
+SETTLE_SECONDS = 2.0
+
+
+def _asset_fields(root: Path, path: Path) -> Optional[Dict[str, str]]:
+    """Map exports/<family>/<asset_name>/<file> to upload form fields (None if outside layout)."""
+    try:
+        family, asset_name, _ = path.relative_to(root).parts
+    except ValueError:
+        return None
+    if family.startswith('.'):
+        return None
+    return {"asset_id": f"{family}_{asset_name}", "version": "1", "family": family}
+
+
+async def _push_task(sess, server: str, root: Path, queue: asyncio.Queue, queued: set):
+    """Upload files reported by the filesystem watcher once they have settled."""
+    while True:
+        path = await queue.get()
+        queued.discard(path)
+        fields = _asset_fields(root, path)
+        if fields is None:
+            continue
+        try:
+            # Hashing and opening block on disk; keep them off the loop so polling continues
+            if not await asyncio.to_thread(path.is_file):
+                continue
+            async with sess.post(f"{server}/api/assets", data=_dumps({
+                "asset_id": fields["asset_id"],
+                "name": path.parent.name,
+                "family": fields["family"],
+                "version": 1,
+                "metadata": {}
+            }), headers={'Content-Type': 'application/json'}) as resp:
+                await resp.read()
+            digest = await asyncio.to_thread(content_hash, str(path))
+            f = await asyncio.to_thread(open, path, 'rb')
+            try:
+                form = aiohttp.FormData(fields)
+                form.add_field('file', f, filename=path.name, content_type='application/octet-stream')
+                async with sess.post(f"{server}/api/upload", data=form, headers={'X-Content-Hash': digest}) as resp:
+                    body = await resp.read()
+                    if resp.status >= 400:
+                        log.warning("upload of %s rejected (%s): %s", path, resp.status, body[:200])
+            finally:
+                await asyncio.to_thread(f.close)
+        except Exception as e:
+            log.warning("push failed for %s: %s", path, e)
+
+
+def _changes_cursor(last: Dict[str, Any]) -> Dict[str, Any]:
+    """/api/changes params resuming after the last item seen.
+    since_id breaks created_at ties, so equal stamps split across pages aren't skipped.
+    """
+    params = {"since": last.get('created_at')}
+    if last.get('id') is not None:
+        params["since_id"] = last['id']
+    return params
+
+
+async def _poll_task(sess, server: str, root: Path, interval: int):
+    """Conditional-GET /api/changes; same contract as the blocking loop."""
+    changes_url = f"{server}/api/changes"
+    cursor: Dict[str, Any] = {}
+    etag = None
+    while True:
+        params = cursor
+        hdr = {"If-None-Match": etag} if etag else {}
+        try:
+            async with sess.get(changes_url, params=params, headers=hdr) as resp:
+                if resp.status == 200:
+                    etag = resp.headers.get("ETag") or etag
+                    body = _loads(await resp.read())
+                    items = body.get('items', []) if isinstance(body, dict) else []
+                    apply_remote_changes(root, items)
+                    if items:
+                        cursor = _changes_cursor(items[-1])
+        except Exception:
+            pass
+        await asyncio.sleep(interval)
+
+
+async def async_loop(server: str, headers: Dict[str, str], root: Path, interval: int = 10):
+    """Run push (watchdog events) and poll as concurrent tasks sharing one aiohttp session."""
+    queue: asyncio.Queue = asyncio.Queue()
+    ev_loop = asyncio.get_running_loop()
+    # Paths still being written: one timer per path, restarted on every event
+    settling: Dict[Path, asyncio.TimerHandle] = {}
+    # Paths waiting in the queue, so a burst of events yields a single upload
+    queued: set = set()
+
+    def _settled(path: Path):
+        settling.pop(path, None)
+        if path not in queued:
+            queued.add(path)
+            queue.put_nowait(path)
+
+    def _touch(path: Path):
+        timer = settling.pop(path, None)
+        if timer is not None:
+            timer.cancel()
+        settling[path] = ev_loop.call_later(SETTLE_SECONDS, _settled, path)
+
+    class _Handler(FileSystemEventHandler):
+        def on_created(self, event):
+            self._enqueue(event)
+
+        def on_modified(self, event):
+            self._enqueue(event)
+
+        def on_moved(self, event):
+            # Save-to-temp-then-rename only reports a move; the new name is the export
+            if not event.is_directory:
+                ev_loop.call_soon_threadsafe(_touch, Path(event.dest_path))
+
+        def _enqueue(self, event):
+            if not event.is_directory:
+                # watchdog calls us from its own thread
+                ev_loop.call_soon_threadsafe(_touch, Path(event.src_path))
+
+    root.mkdir(parents=True, exist_ok=True)
+    observer = Observer()
+    observer.schedule(_Handler(), str(root), recursive=True)
+    observer.start()
+    try:
+        async with aiohttp.ClientSession(headers=headers) as sess:
+            await asyncio.gather(_push_task(sess, server, root, queue, queued),
+                                 _poll_task(sess, server, root, interval))
+    finally:
+        observer.stop()
+        observer.join()
+        for timer in settling.values():
+            timer.cancel()
+
+
 def loop(server: str, api_key: str, root: str, interval: int = 10):
     headers = {"X-API-Key": api_key}
     root_path = Path(root)
-    last_since = None
+    cursor: Dict[str, Any] = {}
+    etag = None
+
+    changes_url = f"{server}/api/changes"
 
     # Initial push pass (best-effort)
     push_local(root_path, server, headers)
 
+    if HAVE_ASYNC:
+        asyncio.run(async_loop(server, headers, root_path, interval))
+        return
+
     while True:
-        code, body = http_get_json(f"{server}/api/changes" + (f"?since={last_since}" if last_since else ""), headers)
+        params = cursor or None
+        code, body, etag = http_get_json_conditional(changes_url, headers, etag, params=params)
+        if code == 304:
+            # Nothing changed since the last poll; no body to parse
+            time.sleep(interval)
+            continue
         if code == 200 and isinstance(body, dict):
             items = body.get('items', [])
             apply_remote_changes(root_path, items)
             if items:
-                last_since = items[-1].get('created_at')
+                cursor = _changes_cursor(items[-1])
         time.sleep(interval)
 
 
@@ -161,6 +418,7 @@ def main():
     ap.add_argument('--root', default='exports')
     ap.add_argument('--interval', type=int, default=10)
     args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
     loop(args.server, args.api_key, args.root, args.interval)
 
 
@@ -6,20 +6,30 @@ This script automatically sets up the Pyblish environment when Maya starts.
 Uses immediate execution to avoid deferred execution issues.
 """
 
-# Startup detection and logging
-print("="*60)
-print("[Pyblish Setup] userSetup.py LOADING...")
-print("[Pyblish Setup] Maya 2022 Pyblish Pipeline Initialization")
-print("="*60)
-
 import sys
 import os
+import bisect
+import stat
+
+# Progress output only with PYBLISH_DEBUG set (Script Editor appends are slow at startup);
+# errors and warnings are always printed
+_DEBUG = bool(os.environ.get('PYBLISH_DEBUG'))
+
+def _log(msg):
+    if _DEBUG:
+        print(msg)
+
+# Startup detection and logging
+_log("="*60)
+_log("[Pyblish Setup] userSetup.py LOADING...")
+_log("[Pyblish Setup] Maya 2022 Pyblish Pipeline Initialization")
+_log("="*60)
 
 # Import Maya modules with error handling
 try:
     import maya.cmds as cmds
     import maya.mel as mel
-    print("[Pyblish Setup] Maya modules imported successfully")
+    _log("[Pyblish Setup] Maya modules imported successfully")
     MAYA_AVAILABLE = True
 except ImportError as e:
     print("[Pyblish Setup] Warning: Maya modules not available: " + str(e))
@@ -28,44 +38,103 @@ except ImportError as e:
 # Global variables for menu functions
 PYBLISH_FUNCTIONS = {}
 
+# Resolved pipeline directory (probed once per session)
+_PIPELINE_DIR_CACHE = None
+
+# Lazily imported modules, resolved on first use and reused by menu callbacks
+_QT = None
+_PYBLISH = None
+_PYBLISH_LITE = None
+
+def _qt():
+    """Return (QtWidgets, QtCore); raises ImportError without PySide2."""
+    global _QT
+    if _QT is None:
+        from PySide2 import QtWidgets, QtCore
+        _QT = (QtWidgets, QtCore)
+    return _QT
+
+def _pyblish():
+    """Return (pyblish.api, pyblish.logic)."""
+    global _PYBLISH
+    if _PYBLISH is None:
+        import pyblish.api
+        import pyblish.logic
+        _PYBLISH = (pyblish.api, pyblish.logic)
+    return _PYBLISH
+
+def _pyblish_lite():
+    """Return the pyblish_lite module (standalone or bundled)."""
+    global _PYBLISH_LITE
+    if _PYBLISH_LITE is None:
+        try:
+            import pyblish_lite
+        except ImportError:
+            import pyblish.tools.lite as pyblish_lite
+        _PYBLISH_LITE = pyblish_lite
+    return _PYBLISH_LITE
+
 def get_pipeline_directory():
     """Get the pipeline directory path."""
+    global _PIPELINE_DIR_CACHE
+    if _PIPELINE_DIR_CACHE is not None:
+        return _PIPELINE_DIR_CACHE
+
     primary_path = "D:\\pyblish"
 
-    if os.path.exists(primary_path) and os.path.exists(os.path.join(primary_path, 'plugins')):
+    # plugins/ existing implies the root exists; one probe instead of two
+    if os.path.isdir(os.path.join(primary_path, 'plugins')):
+        _PIPELINE_DIR_CACHE = primary_path
         return primary_path
 
     print("[Pyblish Setup] ERROR: Pipeline directory not found: " + primary_path)
     return None
 
+_PLUGIN_SUBDIRS = ('collect', 'validate', 'extract', 'integrate')
+
+def _plugin_dirs_signature(plugins_dir):
+    """{subdir: st_mtime_ns or None} for the known plugin subdirs (None if not a directory)."""
+    sig = {}
+    for subdir in _PLUGIN_SUBDIRS:
+        try:
+            st = os.stat(os.path.join(plugins_dir, subdir))
+        except OSError:
+            sig[subdir] = None
+            continue
+        sig[subdir] = st.st_mtime_ns if stat.S_ISDIR(st.st_mode) else None
+    return sig
+
+def _present_plugin_subdirs(plugins_dir):
+    """Known plugin subdirs that exist under plugins_dir, read off the mtime signature."""
+    sig = _plugin_dirs_signature(plugins_dir)
+    return [subdir for subdir in _PLUGIN_SUBDIRS if sig[subdir] is not None]
+
 def setup_pyblish_environment():
     """Set up Pyblish environment and register plugins."""
     try:
-        import pyblish.api
-        print("[Pyblish Setup] Setting up environment...")
+        api, _ = _pyblish()
+        _log("[Pyblish Setup] Setting up environment...")
 
         pipeline_dir = get_pipeline_directory()
         if not pipeline_dir:
             return False
 
-        print("[Pyblish Setup] Using pipeline directory: " + pipeline_dir)
+        _log("[Pyblish Setup] Using pipeline directory: " + pipeline_dir)
 
         # Register plugin paths
         plugins_dir = os.path.join(pipeline_dir, 'plugins')
-        if os.path.exists(plugins_dir):
-            for subdir in ['collect', 'validate', 'extract', 'integrate']:
-                plugin_path = os.path.join(plugins_dir, subdir)
-                if os.path.exists(plugin_path):
-                    pyblish.api.register_plugin_path(plugin_path)
-                    print("[Pyblish Setup] Registered: " + plugin_path)
+        for subdir in _present_plugin_subdirs(plugins_dir):
+            plugin_path = os.path.join(plugins_dir, subdir)
+            api.register_plugin_path(plugin_path)
+            _log("[Pyblish Setup] Registered: " + plugin_path)
 
         # Add to Python path
         if pipeline_dir not in sys.path:
             sys.path.insert(0, pipeline_dir)
 
         # Register Maya as host
-        pyblish.api.register_host("maya")
-        print("[Pyblish Setup] Registered Maya as Pyblish host")
+        api.register_host("maya")
+        _log("[Pyblish Setup] Registered Maya as Pyblish host")
 
         # Default: disable post-collect popup selector (prefer in-Lite selection)
         import os as _os
@@ -80,9 +149,49 @@ def setup_pyblish_environment():
     except Exception as e:
         print("[Pyblish Setup] Setup error: " + str(e))
         return False
+# Discovered plugins, reused until registered paths or plugin files change
+_PLUGIN_CACHE = {"key": None, "plugins": None}
+
+def _plugin_cache_key(api):
+    """(registered paths, PYBLISHPLUGINPATH, registered plugins,
+    newest mtime_ns of dirs/.py files up to depth 2)."""
+    paths = tuple(api.registered_paths())
+    env_paths = os.environ.get("PYBLISHPLUGINPATH", "")
+    plugins = tuple(api.registered_plugins())
+    newest = 0
+
+    def _scan(path, depth):
+        newest_here = 0
+        try:
+            newest_here = os.stat(path).st_mtime_ns
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if depth > 0:
+                            newest_here = max(newest_here, _scan(entry.path, depth - 1))
+                    elif entry.name.endswith(".py"):
+                        newest_here = max(newest_here, entry.stat().st_mtime_ns)
+        except OSError:
+            pass
+        return newest_here
+
+    # discover() also walks PYBLISHPLUGINPATH, so its files count towards the mtime too
+    for path in paths + tuple(p for p in env_paths.split(os.pathsep) if p):
+        newest = max(newest, _scan(path, 1))
+    return (paths, env_paths, plugins, newest)
+
+def _cached_discover():
+    """pyblish.api.discover() memoised on _plugin_cache_key()."""
+    api, _ = _pyblish()
+    key = _plugin_cache_key(api)
+    if _PLUGIN_CACHE["key"] != key:
+        _PLUGIN_CACHE["plugins"] = api.discover()
+        _PLUGIN_CACHE["key"] = key
+    return _PLUGIN_CACHE["plugins"]
+
 def _find_pyblish_window():
     try:
-        from PySide2 import QtWidgets
+        QtWidgets, _ = _qt()
     except Exception:
         return None
     for w in QtWidgets.QApplication.topLevelWidgets():
@@ -98,20 +207,29 @@ def _find_pyblish_window():
 def show_pyblish_lite():
     """Show Pyblish Lite interface."""
     try:
+        window = _pyblish_lite().show()
+        # Lite may hand back a rebuilt window; drop any stale button index
         try:
-            import pyblish_lite
-        except ImportError:
-            import pyblish.tools.lite as pyblish_lite
-
-        window = pyblish_lite.show()
-        print("[Pyblish] Opened Pyblish Lite interface")
-        try:
-            _auto_collect(window)  # auto press Reset/Collect to populate instances
-            _orient_lite_to_instances(window)
-            _show_lite_hint(window)
-            _show_instance_selector_panel(window)  # side selector with checkboxes
+            window._pyblish_btn_idx = None
         except Exception:
             pass
+        _log("[Pyblish] Opened Pyblish Lite interface")
+
+        def _bootstrap():
+            try:
+                _auto_collect(window)  # auto press Reset/Collect to populate instances
+                _orient_lite_to_instances(window)
+                _show_lite_hint(window)
+                _show_instance_selector_panel(window)  # side selector with checkboxes
+            except Exception:
+                pass
+
+        # One deferred callback (widgets need a moment to build); helpers share one button index
+        try:
+            _, QtCore = _qt()
+            QtCore.QTimer.singleShot(250, _bootstrap)
+        except Exception:
+            _bootstrap()
         return window
 
     except Exception as e:
@@ -124,91 +242,69 @@ def show_pyblish_lite():
                 button=['OK']
             )
         return None
+def _button_index(window):
+    """Map lowercased 'text toolTip objectName' -> button, cached on the window.
+    One findChildren traversal shared by _auto_collect and _orient_lite_to_instances.
+    """
+    idx = getattr(window, "_pyblish_btn_idx", None)
+    if idx is None:
+        QtWidgets, _ = _qt()
+        idx = {}
+        # QAbstractButton always provides these getters; call them directly
+        for btn in window.findChildren(QtWidgets.QAbstractButton):
+            probe = (btn.text() or "") + " " + (btn.toolTip() or "") + " " + (btn.objectName() or "")
+            idx.setdefault(probe.lower(), btn)
+        window._pyblish_btn_idx = idx
+    return idx
+
 def _auto_collect(window):
     """Auto press Reset/Collect in Lite to populate instances."""
     try:
-        from PySide2 import QtWidgets, QtCore
-    except Exception:
-        return
-
-    def _press():
-        try:
-            # Try to find a button with tooltip/text mentioning Collect or Reset
-            for btn in window.findChildren(QtWidgets.QAbstractButton):
-                txts = []
-                for attr in ("toolTip", "text", "objectName"):
-                    try:
-                        v = getattr(btn, attr)()
-                    except Exception:
-                        v = getattr(btn, attr, "")
-                    txts.append(str(v))
-                txt = (" ".join(txts)).lower()
-                if ("collect" in txt) or ("reset" in txt):
-                    try:
-                        btn.click()
-                        return
-                    except Exception:
-                        pass
-        except Exception:
-            pass
-
-    try:
-        from PySide2 import QtCore  # noqa
-        QtCore.QTimer.singleShot(250, _press)
+        # Try to find a button with tooltip/text mentioning Collect or Reset
+        for txt, btn in _button_index(window).items():
+            if ("collect" in txt) or ("reset" in txt):
+                try:
+                    btn.click()
+                    return
+                except Exception:
+                    pass
     except Exception:
-        _press()
-
-    return
+        pass
 def _orient_lite_to_instances(window):
     """Try to switch Lite to Instances view and focus it.
     Uses heuristics to find a button or action containing 'Instance'.
     ASCII-only to be safe in Maya.
     """
     try:
-        from PySide2 import QtWidgets, QtCore
+        QtWidgets, QtCore = _qt()
     except Exception:
         return
 
-    def _click_instances():
-        try:
-            # Try actions first
-            for action in window.findChildren(QtWidgets.QAction):
-                txt = (action.text() or "") + " " + (action.toolTip() or "") + " " + (action.objectName() or "")
-                if "instance" in txt.lower():
-                    action.trigger()
+    try:
+        # Try actions first
+        for action in window.findChildren(QtWidgets.QAction):
+            txt = (action.text() or "") + " " + (action.toolTip() or "") + " " + (action.objectName() or "")
+            if "instance" in txt.lower():
+                action.trigger()
+                window.activateWindow()
+                return
+        # Try buttons
+        for txt, btn in _button_index(window).items():
+            if "instance" in txt:
+                try:
+                    btn.click()
                     window.activateWindow()
                     return
-            # Try buttons
-            for btn in window.findChildren(QtWidgets.QAbstractButton):
-                parts = []
-                for attr in ("text", "toolTip", "objectName"):
-                    try:
-                        v = getattr(btn, attr)()
-                    except Exception:
-                        v = getattr(btn, attr, "")
-                    parts.append(str(v))
-                if "instance" in (" ".join(parts)).lower():
-                    try:
-                        btn.click()
-                        window.activateWindow()
-                        return
-                    except Exception:
-                        pass
-        except Exception:
-            pass
-
-    # Defer a bit to allow widgets to build
-    try:
-        from PySide2 import QtCore  # noqa
-        QtCore.QTimer.singleShot(200, _click_instances)
+                except Exception:
+                    pass
     except Exception:
-        _click_instances()
+        pass
 
 
 def _show_lite_hint(window):
     """Show a small ASCII help panel near Lite window (left side)."""
     try:
-        from PySide2 import QtWidgets, QtCore
+        QtWidgets, QtCore = _qt()
     except Exception:
         return
 
@@ -256,14 +352,22 @@ def _show_lite_hint(window):
     except Exception:
         pass
 
+def _lite_context(window):
+    """Return the context already collected by the Lite window's controller, or None."""
+    for attr in ("controller", "_controller", "model"):
+        c = getattr(window, attr, None)
+        if c is not None and hasattr(c, "context"):
+            return c.context
+    return None
+
 def _show_instance_selector_panel(window):
     """Dock-like panel near Lite listing instances with checkboxes.
     It persists overrides to utils.publish_overrides for plugins to consume.
     """
     try:
-        from PySide2 import QtWidgets, QtCore
+        QtWidgets, QtCore = _qt()
+        api, logic = _pyblish()
         from utils import publish_overrides as po
-        import pyblish.api
     except Exception:
         return
 
@@ -283,43 +387,49 @@ def _show_instance_selector_panel(window):
     scroll.setWidget(inner)
     layout = QtWidgets.QVBoxLayout(inner)
     layout.setContentsMargins(6, 6, 6, 6)
+    layout.addStretch(1)
 
-    cbs = []
+    # name -> checkbox, kept in alphabetical layout order above the stretch
+    cbs = {}
 
     def populate():
-        # Discover instances by running collection (fast); names only
-        for i in reversed(range(layout.count())):
-            w = layout.itemAt(i).widget()
-            if w is not None:
-                w.setParent(None)
-        cbs[:] = []
+        # Prefer the instances Lite already collected; names only
         try:
-            # Run discovery only (collect); do not modify current Lite context
-            import pyblish.logic as logic
-            import pyblish.api as api
-            context = api.Context()
-            for plugin in api.collectors():
-                try:
-                    logic.process(context, plugin())
-                except Exception:
-                    pass
+            context = _lite_context(window)
+            if context is None or not len(context):
+                # Run discovery only (collect); do not modify current Lite context
+                context = api.Context()
+                collectors = [p for p in _cached_discover() if p.order < api.CollectorOrder + 0.5]
+                for plugin in collectors:
+                    try:
+                        logic.process(context, plugin())
+                    except Exception:
+                        pass
             names = [inst.name for inst in context]
         except Exception:
             names = []
         if not names:
             names = []
+        # Only touch the delta; existing checkboxes keep the user's current state
+        new_names = set(names)
+        for name in list(cbs):
+            if name not in new_names:
+                cbs.pop(name).setParent(None)
+        added = sorted(new_names.difference(cbs))
+        if not added:
+            return
         saved = po.load_overrides()
-        for name in sorted(set(names)):
+        order = sorted(cbs)
+        for name in added:
             cb = QtWidgets.QCheckBox(name)
             cb.setChecked(bool(saved.get(name, True)))
-            layout.addWidget(cb)
-            cbs.append(cb)
-        layout.addStretch(1)
+            pos = bisect.bisect_left(order, name)
+            order.insert(pos, name)
+            layout.insertWidget(pos, cb)
+            cbs[name] = cb
 
     def apply_and_save():
-        mapping = {}
-        for cb in cbs:
-            mapping[str(cb.text())] = bool(cb.isChecked())
+        mapping = dict((name, bool(cb.isChecked())) for name, cb in cbs.items())
         po.save_overrides(mapping)
         info.setText("Saved overrides ({})".format(len(mapping)))
 
@@ -366,19 +476,18 @@ def review_instances_post_collect():
 def test_pyblish_pipeline():
     """Test the Pyblish pipeline."""
     try:
-        import pyblish.api
-
-        plugins = pyblish.api.discover()
+        plugins = _cached_discover()
         print("[Pyblish Test] Found " + str(len(plugins)) + " plugins")
 
+        # Per-plugin listing only in debug mode
         for plugin in plugins:
             order = getattr(plugin, 'order', 0)
-            print("  - " + plugin.__name__ + " (order: " + str(order) + ")")
+            _log("  - " + plugin.__name__ + " (order: " + str(order) + ")")
 
         if MAYA_AVAILABLE:
             cmds.confirmDialog(
                 title='Pipeline Test',
-                message='Found ' + str(len(plugins)) + ' plugins.\nCheck Script Editor for details.',
+                message='Found ' + str(len(plugins)) + ' plugins.\nSet PYBLISH_DEBUG=1 to list them in the Script Editor.',
                 button=['OK']
             )
 
@@ -391,7 +500,7 @@ def create_pyblish_menu():
         return False
 
     try:
-        print("[Pyblish Setup] Creating Pyblish menu...")
+        _log("[Pyblish Setup] Creating Pyblish menu...")
 
         # Store functions globally
         global PYBLISH_FUNCTIONS
@@ -442,7 +551,7 @@ def create_pyblish_menu():
             parent=main_menu
         )
 
-        print("[Pyblish Setup] Pyblish menu created successfully")
+        _log("[Pyblish Setup] Pyblish menu created successfully")
         return True
 
     except Exception as e:
@@ -451,15 +560,15 @@ def create_pyblish_menu():
 
 def main():
     """Main setup function."""
-    print("\n[Pyblish Setup] Initializing Pyblish Production Pipeline...")
+    _log("\n[Pyblish Setup] Initializing Pyblish Production Pipeline...")
 
     try:
         if setup_pyblish_environment():
-            print("[Pyblish Setup] Environment setup completed")
+            _log("[Pyblish Setup] Environment setup completed")
 
             if create_pyblish_menu():
-                print("[Pyblish Setup] Menu creation completed")
-                print("[Pyblish Setup] Look for 'Pyblish' menu in Maya's main menu bar")
+                _log("[Pyblish Setup] Menu creation completed")
+                _log("[Pyblish Setup] Look for 'Pyblish' menu in Maya's main menu bar")
             else:
                 print("[Pyblish Setup] Menu creation failed")
         else:
@@ -470,15 +579,15 @@ def main():
         import traceback
         traceback.print_exc()
 
-    print("[Pyblish Setup] Initialization completed")
-    print("="*60)
+    _log("[Pyblish Setup] Initialization completed")
+    _log("="*60)
 
 # Store functions in main module
 import __main__
 __main__.PYBLISH_FUNCTIONS = PYBLISH_FUNCTIONS
 
 # Execute setup immediately to avoid deferred execution issues
-print("[Pyblish Setup] Executing setup...")
+_log("[Pyblish Setup] Executing setup...")
 
 if MAYA_AVAILABLE:
     # Use a simple timer-based delay instead of executeDeferred
@@ -488,12 +597,12 @@ if MAYA_AVAILABLE:
 
         # Try to delay execution slightly
         cmds.scriptJob(runOnce=True, event=['idle', delayed_main])
-        print("[Pyblish Setup] Scheduled with scriptJob idle event")
+        _log("[Pyblish Setup] Scheduled with scriptJob idle event")
     except:
         # Fallback to immediate execution
-        print("[Pyblish Setup] Immediate execution fallback")
+        _log("[Pyblish Setup] Immediate execution fallback")
         main()
 else:
     main()
 
-print("[Pyblish Setup] userSetup.py loading completed")
+_log("[Pyblish Setup] userSetup.py loading completed")
@@ -6,16 +6,62 @@ This module contains utility functions for file operations in the Pyblish pipeli
 
 import os
 import re
+import sys
+import time
 import shutil
 import json
 from datetime import datetime
 
+# Optional orjson: faster JSON encode/decode, falls back to the json module
+try:
+    import orjson
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
+
+
+# Precompiled patterns
+_VERSION_RE = re.compile(r'_v(\d{3})$')  # version suffix (e.g., _v001)
+_MULTI_UNDERSCORE_RE = re.compile(r'_+')
+
+# Directories skipped by find_files_by_extension (our own backups and Maya/tool caches)
+DEFAULT_IGNORE_DIRS = frozenset({'backup', '.git', '.mayaSwatches', '__pycache__'})
+
+# Invalid filename characters -> '_' (str.translate table)
+_CLEAN_TABLE = str.maketrans({c: '_' for c in '<>:"/\\|?*'})
+
+
+def _fast_copy(source, destination):
+    """Copy file data and metadata like shutil.copy2.
+    Windows uses CopyFileExW (server-side copy on SMB shares); elsewhere shutil.copy2,
+    which already uses os.sendfile / fcopyfile internally.
+    """
+    if sys.platform != 'win32':
+        return shutil.copy2(source, destination)
+    # Same pre-checks as copy2, done before anything opens the destination
+    if os.path.isdir(destination):
+        destination = os.path.join(destination, os.path.basename(source))
+    if os.path.exists(destination) and os.path.samefile(source, destination):
+        raise shutil.SameFileError(f"{source!r} and {destination!r} are the same file")
+    import ctypes
+    copied = bool(ctypes.windll.kernel32.CopyFileExW(
+        ctypes.c_wchar_p(source), ctypes.c_wchar_p(destination), None, None, None, 0))
+    if not copied:
+        shutil.copyfile(source, destination)
+    shutil.copystat(source, destination)
+    return destination
+
 
 def ensure_directory(directory_path):
     """Ensure a directory exists, create if it doesn't."""
-    if not os.path.exists(directory_path):
+    if not directory_path:
+        return directory_path
+    # Single mkdir on the common already-exists path instead of exists() + makedirs()
+    try:
         os.makedirs(directory_path)
         print(f"Created directory: {directory_path}")
+    except FileExistsError:
+        pass
     return directory_path
 
 
@@ -26,8 +72,7 @@ def get_next_version(file_path):
     name, ext = os.path.splitext(filename)
     
     # Extract version pattern (e.g., _v001)
-    version_pattern = r'_v(\d{3})$'
-    match = re.search(version_pattern, name)
+    match = _VERSION_RE.search(name)
     
     if match:
         current_version = int(match.group(1))
@@ -36,19 +81,29 @@ def get_next_version(file_path):
         current_version = 0
         base_name = name
     
-    # Find existing versions
-    existing_versions = []
+    # Find the highest existing version: <base_name>_vNNN<ext>
+    # (scandir reuses d_type, no per-entry stat; plain string checks instead of a regex per file)
+    max_version = None
+    base_len = len(base_name)
     if os.path.exists(directory):
-        for existing_file in os.listdir(directory):
-            existing_name, existing_ext = os.path.splitext(existing_file)
-            if existing_ext == ext and existing_name.startswith(base_name):
-                version_match = re.search(version_pattern, existing_name)
-                if version_match:
-                    existing_versions.append(int(version_match.group(1)))
+        with os.scandir(directory) as it:
+            for entry in it:
+                existing_name, existing_ext = os.path.splitext(entry.name)
+                if (existing_ext != ext
+                        or len(existing_name) != base_len + 5
+                        or not existing_name.startswith(base_name)
+                        or existing_name[base_len:base_len + 2] != '_v'
+                        or not existing_name[-3:].isdecimal()):
+                    continue
+                if not entry.is_file():
+                    continue
+                version = int(existing_name[-3:])
+                if max_version is None or version > max_version:
+                    max_version = version
     
     # Get next version
-    if existing_versions:
-        next_version = max(existing_versions) + 1
+    if max_version is not None:
+        next_version = max_version + 1
     else:
         next_version = current_version + 1
     
@@ -73,7 +128,7 @@ def backup_file(file_path, backup_dir=None):
     backup_filename = f"{name}_{timestamp}{ext}"
     backup_path = os.path.join(backup_dir, backup_filename)
     
-    shutil.copy2(file_path, backup_path)
+    _fast_copy(file_path, backup_path)
     print(f"Backed up file: {backup_path}")
     return backup_path
 
@@ -81,11 +136,10 @@ def backup_file(file_path, backup_dir=None):
 def clean_filename(filename):
     """Clean a filename to remove invalid characters."""
     # Remove invalid characters
-    invalid_chars = r'[<>:"/\\|?*]'
-    clean_name = re.sub(invalid_chars, '_', filename)
+    clean_name = filename.translate(_CLEAN_TABLE)
     
     # Remove multiple underscores
-    clean_name = re.sub(r'_+', '_', clean_name)
+    clean_name = _MULTI_UNDERSCORE_RE.sub('_', clean_name)
     
     # Remove leading/trailing underscores and dots
     clean_name = clean_name.strip('_.')
@@ -109,7 +163,7 @@ def get_file_size_mb(file_path):
 def copy_with_metadata(source, destination):
     """Copy file with metadata preservation."""
     ensure_directory(os.path.dirname(destination))
-    shutil.copy2(source, destination)
+    _fast_copy(source, destination)
     print(f"Copied: {source} -> {destination}")
     return destination
 
@@ -125,29 +179,47 @@ def move_with_backup(source, destination):
     return destination
 
 
+def _iter_files(directory, ignore=frozenset()):
+    """Yield DirEntry objects for all files under directory (scandir-based walk).
+    Subdirectories whose name is in ignore are pruned.
+    """
+    subdirs = []
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in ignore:
+                        subdirs.append(entry.path)
+                elif entry.is_file():
+                    yield entry
+    except OSError:
+        return
+    for subdir in subdirs:
+        yield from _iter_files(subdir, ignore)
+
+
 def find_files_by_pattern(directory, pattern):
-    """Find files matching a pattern in a directory."""
+    """Find files matching a pattern (string or compiled regex) in a directory."""
+    pat = re.compile(pattern) if isinstance(pattern, str) else pattern
     matching_files = []
     if os.path.exists(directory):
-        for root, dirs, files in os.walk(directory):
-            for file in files:
-                if re.match(pattern, file):
-                    matching_files.append(os.path.join(root, file))
+        for entry in _iter_files(directory):
+            if pat.match(entry.name):
+                matching_files.append(entry.path)
     return matching_files
 
 
-def find_files_by_extension(directory, extensions):
-    """Find files with specific extensions in a directory."""
+def find_files_by_extension(directory, extensions, ignore=DEFAULT_IGNORE_DIRS):
+    """Find files with specific extensions in a directory, skipping ignored subdirectories."""
     if isinstance(extensions, str):
         extensions = [extensions]
+    exts = frozenset(e.lower() if e.startswith('.') else '.' + e.lower() for e in extensions)
     
     matching_files = []
     if os.path.exists(directory):
-        for root, dirs, files in os.walk(directory):
-            for file in files:
-                _, ext = os.path.splitext(file)
-                if ext.lower() in [e.lower() for e in extensions]:
-                    matching_files.append(os.path.join(root, file))
+        for entry in _iter_files(directory, ignore):
+            if os.path.splitext(entry.name)[1].lower() in exts:
+                matching_files.append(entry.path)
     return matching_files
 
 
@@ -180,55 +252,78 @@ def create_directory_structure(base_path, structure):
 def save_json(data, file_path):
     """Save data to JSON file."""
     ensure_directory(os.path.dirname(file_path))
-    with open(file_path, 'w') as f:
-        json.dump(data, f, indent=4)
+    if _HAS_ORJSON:
+        with open(file_path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(file_path, 'w') as f:
+            json.dump(data, f, indent=2)
     print(f"Saved JSON: {file_path}")
 
 
 def load_json(file_path):
     """Load data from JSON file."""
     if os.path.exists(file_path):
+        if _HAS_ORJSON:
+            with open(file_path, 'rb') as f:
+                return orjson.loads(f.read())
         with open(file_path, 'r') as f:
             return json.load(f)
     return None
 
 
-def get_disk_usage(path):
-    """Get disk usage statistics for a path."""
-    if os.path.exists(path):
+# Disk usage per volume: {st_dev: (timestamp, total, used, free)}
+_DU_CACHE = {}
+
+
+def get_disk_usage(path, ttl=2.0):
+    """Get disk usage statistics for a path.
+    
+    Results are cached per volume (st_dev) for ttl seconds, so paths on
+    the same drive share one disk-usage query.
+    """
+    try:
+        volume = os.stat(path).st_dev
+    except OSError:
+        return None
+    now = time.monotonic()
+    cached = _DU_CACHE.get(volume)
+    if cached is not None and now - cached[0] < ttl:
+        _, total, used, free = cached
+    else:
         total, used, free = shutil.disk_usage(path)
-        return {
-            'total': total,
-            'used': used,
-            'free': free,
-            'total_gb': total / (1024**3),
-            'used_gb': used / (1024**3),
-            'free_gb': free / (1024**3),
-        }
-    return None
+        _DU_CACHE[volume] = (now, total, used, free)
+    return {
+        'total': total,
+        'used': used,
+        'free': free,
+        'total_gb': total / (1024**3),
+        'used_gb': used / (1024**3),
+        'free_gb': free / (1024**3),
+    }
 
 
 def validate_file_path(file_path):
-    """Validate if a file path is valid and accessible."""
+    """Validate if a file path is valid and accessible.
+    
+    Writability is checked with os.access on the directory rather than a
+    create/delete probe; Windows ACLs can still make the real write fail.
+    """
     try:
         # Check if path is valid
         os.path.normpath(file_path)
         
         # Check if directory exists or can be created
         directory = os.path.dirname(file_path)
-        if directory and not os.path.exists(directory):
+        if directory:
             try:
-                os.makedirs(directory)
+                os.makedirs(directory, exist_ok=True)
             except OSError:
                 return False, "Cannot create directory"
         
         # Check if file can be written (if it doesn't exist)
         if not os.path.exists(file_path):
-            try:
-                with open(file_path, 'w') as f:
-                    pass
-                os.remove(file_path)
-            except OSError:
+            if not os.access(directory or '.', os.W_OK):
                 return False, "Cannot write to location"
         
         return True, "Valid path"
@@ -6,108 +6,125 @@ This module contains utility functions for working with Maya in the Pyblish pipe
 
 import os
 import re
+import functools
+from collections import defaultdict
+
+try:
+    import maya.cmds as cmds
+except ImportError:
+    cmds = None
+
+# Maya time unit -> frames per second
+_FPS_MAPPING = {
+    'game': 15,
+    'film': 24,
+    'pal': 25,
+    'ntsc': 30,
+    'show': 48,
+    'palf': 50,
+    'ntscf': 60
+}
 
 
 def get_maya_selection():
     """Get currently selected objects in Maya."""
-    try:
-        import maya.cmds as cmds
-        return cmds.ls(selection=True, long=True) or []
-    except ImportError:
+    if cmds is None:
         print("Maya not available")
         return []
+    return cmds.ls(selection=True, long=True) or []
 
 
 def get_scene_name():
     """Get the current Maya scene name."""
-    try:
-        import maya.cmds as cmds
-        scene_path = cmds.file(query=True, sceneName=True)
-        if scene_path:
-            return os.path.basename(scene_path)
-        return "untitled"
-    except ImportError:
+    if cmds is None:
         print("Maya not available")
         return "untitled"
+    scene_path = cmds.file(query=True, sceneName=True)
+    if scene_path:
+        return os.path.basename(scene_path)
+    return "untitled"
 
 
 def get_scene_path():
     """Get the current Maya scene path."""
-    try:
-        import maya.cmds as cmds
-        return cmds.file(query=True, sceneName=True) or ""
-    except ImportError:
+    if cmds is None:
         print("Maya not available")
         return ""
+    return cmds.file(query=True, sceneName=True) or ""
 
 
 def get_frame_range():
     """Get the current frame range from Maya."""
-    try:
-        import maya.cmds as cmds
-        start_frame = cmds.playbackOptions(query=True, minTime=True)
-        end_frame = cmds.playbackOptions(query=True, maxTime=True)
-        return int(start_frame), int(end_frame)
-    except ImportError:
+    if cmds is None:
         print("Maya not available")
         return 1, 100
+    start_frame = cmds.playbackOptions(query=True, minTime=True)
+    end_frame = cmds.playbackOptions(query=True, maxTime=True)
+    return int(start_frame), int(end_frame)
 
 
 def get_current_frame():
     """Get the current frame in Maya."""
-    try:
-        import maya.cmds as cmds
-        return int(cmds.currentTime(query=True))
-    except ImportError:
+    if cmds is None:
         print("Maya not available")
         return 1
+    return int(cmds.currentTime(query=True))
 
 
 def get_fps():
     """Get the current frames per second setting."""
-    try:
-        import maya.cmds as cmds
-        time_unit = cmds.currentUnit(query=True, time=True)
-        fps_mapping = {
-            'game': 15,
-            'film': 24,
-            'pal': 25,
-            'ntsc': 30,
-            'show': 48,
-            'palf': 50,
-            'ntscf': 60
-        }
-        return fps_mapping.get(time_unit, 24)
-    except ImportError:
+    if cmds is None:
         print("Maya not available")
         return 24
+    time_unit = cmds.currentUnit(query=True, time=True)
+    return _FPS_MAPPING.get(time_unit, 24)
+
+
+# Events after which the cached scene units may be stale
+_UNIT_EVENTS = ('SceneOpened', 'NewSceneOpened',
+                'linearUnitChanged', 'angularUnitChanged', 'timeUnitChanged')
+_unit_jobs = []
+
+
+@functools.lru_cache(maxsize=1)
+def _get_scene_units_raw():
+    return {
+        'linear': cmds.currentUnit(query=True, linear=True),
+        'angular': cmds.currentUnit(query=True, angle=True),
+        'time': cmds.currentUnit(query=True, time=True)
+    }
+
+
+def invalidate_scene_units_cache():
+    """Drop the cached scene units so the next get_scene_units() re-queries Maya."""
+    _get_scene_units_raw.cache_clear()
+
+
+def _register_unit_jobs():
+    if _unit_jobs:
+        return
+    for event in _UNIT_EVENTS:
+        try:
+            _unit_jobs.append(cmds.scriptJob(event=[event, invalidate_scene_units_cache]))
+        except Exception:
+            pass
 
 
 def get_scene_units():
-    """Get the current scene units."""
-    try:
-        import maya.cmds as cmds
-        linear_unit = cmds.currentUnit(query=True, linear=True)
-        angular_unit = cmds.currentUnit(query=True, angle=True)
-        time_unit = cmds.currentUnit(query=True, time=True)
-        return {
-            'linear': linear_unit,
-            'angular': angular_unit,
-            'time': time_unit
-        }
-    except ImportError:
+    """Get the current scene units (cached until the scene or a unit changes)."""
+    if cmds is None:
         print("Maya not available")
         return {'linear': 'cm', 'angular': 'deg', 'time': 'film'}
+    _register_unit_jobs()
+    return dict(_get_scene_units_raw())
 
 
 def get_objects_by_type(object_type):
-    """Get all objects of a specific type in the scene."""
-    try:
-        import maya.cmds as cmds
-        return cmds.ls(type=object_type, long=True) or []
-    except ImportError:
+    """Get all objects of a specific type (or list of types) in the scene."""
+    if cmds is None:
         print("Maya not available")
         return []
+    return cmds.ls(type=object_type, long=True) or []
 
 
 def get_meshes():
@@ -123,64 +140,67 @@ def get_cameras():
 def get_lights():
     """Get all light objects in the scene."""
     light_types = ['directionalLight', 'pointLight', 'spotLight', 'areaLight']
-    lights = []
-    for light_type in light_types:
-        lights.extend(get_objects_by_type(light_type))
-    return lights
+    return get_objects_by_type(light_types)
 
 
 def get_materials():
     """Get all material nodes in the scene."""
-    try:
-        import maya.cmds as cmds
-        materials = []
-        shader_types = ['lambert', 'blinn', 'phong', 'surfaceShader', 'standardSurface']
-        for shader_type in shader_types:
-            materials.extend(cmds.ls(type=shader_type) or [])
-        return materials
-    except ImportError:
+    if cmds is None:
         print("Maya not available")
         return []
+    shader_types = ['lambert', 'blinn', 'phong', 'surfaceShader', 'standardSurface']
+    return cmds.ls(type=shader_types) or []
 
 
 def get_polycount(mesh_list=None):
     """Get polygon count for specified meshes or all meshes."""
-    try:
-        import maya.cmds as cmds
-        if mesh_list is None:
-            mesh_list = get_meshes()
-        
-        total_faces = 0
-        total_vertices = 0
-        
-        for mesh in mesh_list:
-            try:
-                face_count = cmds.polyEvaluate(mesh, face=True) or 0
-                vertex_count = cmds.polyEvaluate(mesh, vertex=True) or 0
-                total_faces += face_count
-                total_vertices += vertex_count
-            except:
-                continue
-                
-        return {'faces': total_faces, 'vertices': total_vertices}
-    except ImportError:
+    if cmds is None:
         print("Maya not available")
         return {'faces': 0, 'vertices': 0}
+    if mesh_list is None:
+        mesh_list = get_meshes()
+    if not mesh_list:
+        return {'faces': 0, 'vertices': 0}
+    
+    # One polyEvaluate over the whole list returns aggregate totals
+    try:
+        result = cmds.polyEvaluate(mesh_list, face=True, vertex=True)
+        if isinstance(result, dict):
+            return {'faces': result.get('face') or 0,
+                    'vertices': result.get('vertex') or 0}
+    except Exception:
+        pass
+    
+    total_faces = 0
+    total_vertices = 0
+    
+    for mesh in mesh_list:
+        try:
+            counts = cmds.polyEvaluate(mesh, face=True, vertex=True)
+            total_faces += counts.get('face') or 0
+            total_vertices += counts.get('vertex') or 0
+        except:
+            continue
+            
+    return {'faces': total_faces, 'vertices': total_vertices}
+
+
+@functools.lru_cache(maxsize=128)
+def _compile_pattern(pattern):
+    return re.compile(pattern)
 
 
 def validate_naming_convention(name, pattern):
     """Validate if a name follows the specified naming convention."""
-    return bool(re.match(pattern, name))
+    return bool(_compile_pattern(pattern).match(name))
 
 
 def get_uv_sets(mesh):
     """Get UV sets for a mesh."""
-    try:
-        import maya.cmds as cmds
-        return cmds.polyUVSet(mesh, query=True, allUVSets=True) or []
-    except ImportError:
+    if cmds is None:
         print("Maya not available")
         return []
+    return cmds.polyUVSet(mesh, query=True, allUVSets=True) or []
 
 
 def has_uv_coordinates(mesh):
@@ -191,24 +211,32 @@ def has_uv_coordinates(mesh):
 
 def get_texture_files():
     """Get all texture file nodes in the scene."""
-    try:
-        import maya.cmds as cmds
-        file_nodes = cmds.ls(type='file') or []
-        texture_files = []
-        
-        for node in file_nodes:
-            file_path = cmds.getAttr(f"{node}.fileTextureName")
-            if file_path:
-                texture_files.append({
-                    'node': node,
-                    'path': file_path,
-                    'exists': os.path.exists(file_path)
-                })
-        
-        return texture_files
-    except ImportError:
+    if cmds is None:
         print("Maya not available")
         return []
+    file_nodes = cmds.ls(type='file') or []
+    texture_files = []
+    by_dir = defaultdict(list)
+    
+    for node in file_nodes:
+        file_path = cmds.getAttr(f"{node}.fileTextureName")
+        if file_path:
+            entry = {'node': node, 'path': file_path, 'exists': False}
+            texture_files.append(entry)
+            by_dir[os.path.dirname(file_path)].append(entry)
+    
+    # One directory listing per unique folder instead of a stat per texture
+    for directory, entries in by_dir.items():
+        try:
+            with os.scandir(directory or '.') as it:
+                names = {os.path.normcase(e.name) for e in it}
+        except OSError:
+            continue
+        for entry in entries:
+            name = os.path.normcase(os.path.basename(entry['path']))
+            entry['exists'] = name in names
+    
+    return texture_files
 
 
 def get_missing_textures():
@@ -219,10 +247,11 @@ def get_missing_textures():
 
 def create_workspace_mel():
     """Create a workspace.mel file for the current project."""
-    try:
-        import maya.cmds as cmds
-        workspace_path = cmds.workspace(query=True, rootDirectory=True)
-        mel_content = '''//Maya 2023 Project Definition
+    if cmds is None:
+        print("Maya not available")
+        return None
+    workspace_path = cmds.workspace(query=True, rootDirectory=True)
+    mel_content = '''//Maya 2023 Project Definition
 
 workspace -fr "fluidCache" "cache/nCache/fluid";
 workspace -fr "images" "images";
@@ -250,12 +279,9 @@ workspace -fr "templates" "assets";
 workspace -fr "OBJexport" "data";
 workspace -fr "furEqualMap" "renderData/fur/furEqualMap";
 '''
-        
-        mel_file_path = os.path.join(workspace_path, "workspace.mel")
-        with open(mel_file_path, 'w') as f:
-            f.write(mel_content)
-        
-        return mel_file_path
-    except ImportError:
-        print("Maya not available")
-        return None
+    
+    mel_file_path = os.path.join(workspace_path, "workspace.mel")
+    with open(mel_file_path, 'w') as f:
+        f.write(mel_content)
+    
+    return mel_file_path
@@ -6,9 +6,20 @@ ASCII-only for Maya 2022 compatibility.
 import os
 import json
 
+# Optional orjson: faster encode, falls back to the json module
+try:
+    import orjson
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
+
 _DEF_DIRNAME = ".runtime"
 _DEF_FILENAME = "publish_overrides.json"
 
+# Parsed file contents, valid while the file's stat signature is unchanged
+_cache_mtime = None
+_cache_data = {}
+
 
 def _repo_root():
     # utils/ is under repo root; go up one
@@ -25,35 +36,69 @@ def overrides_path():
     return os.path.join(d, _DEF_FILENAME)
 
 
-def load_overrides():
+def _stat_key(path):
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _read_cached():
+    """Return the cached mapping, reparsing only when the file changed."""
+    global _cache_mtime, _cache_data
     path = overrides_path()
     try:
-        if os.path.exists(path):
-            with open(path, "r") as f:
-                data = json.load(f)
-                if isinstance(data, dict):
-                    return {str(k): bool(v) for k, v in data.items()}
+        key = _stat_key(path)
+    except OSError:
+        _cache_mtime, _cache_data = None, {}
+        return _cache_data
+    if key == _cache_mtime:
+        return _cache_data
+    data = {}
+    try:
+        with open(path, "r") as f:
+            raw = json.load(f)
+            if isinstance(raw, dict):
+                data = {str(k): bool(v) for k, v in raw.items()}
     except Exception:
         pass
-    return {}
+    _cache_mtime, _cache_data = key, data
+    return data
+
+
+def load_overrides():
+    return dict(_read_cached())
 
 
 def save_overrides(mapping):
+    global _cache_mtime, _cache_data
     path = overrides_path()
+    clean = {str(k): bool(v) for k, v in mapping.items()}
+    if _HAS_ORJSON:
+        buf = orjson.dumps(clean, option=orjson.OPT_SORT_KEYS | orjson.OPT_INDENT_2)
+    else:
+        buf = json.dumps(clean, indent=2, sort_keys=True).encode("ascii")
+    tmp = path + ".tmp"
     try:
-        with open(path, "w") as f:
-            json.dump({str(k): bool(v) for k, v in mapping.items()}, f, indent=2, sort_keys=True)
+        # Single write to a temp file, then swap in so readers never see a partial file
+        with open(tmp, "wb") as f:
+            f.write(buf)
+        os.replace(tmp, path)
+        _cache_mtime, _cache_data = _stat_key(path), clean
         return True
     except Exception:
         return False
 
 
+def save_overrides_many(updates):
+    """Merge several name -> bool updates and write the file once."""
+    data = dict(_read_cached())
+    data.update((str(k), bool(v)) for k, v in updates.items())
+    return save_overrides(data)
+
+
 def set_override(name, value):
-    data = load_overrides()
-    data[str(name)] = bool(value)
-    save_overrides(data)
+    return save_overrides_many({name: value})
 
 
 def get_override(name, default=True):
-    return load_overrides().get(str(name), bool(default))
+    return _read_cached().get(str(name), bool(default))
 
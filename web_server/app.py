@@ -9,78 +9,225 @@ Run:  python -m web_server.app  (or `flask --app web_server.app run`)
 """
 from __future__ import annotations
 import os
-import io
 import json
+import shutil
+import signal
+import sqlite3
+import time
+import unicodedata
 import zipfile
+from collections import deque
 from datetime import datetime
 from typing import Any, Dict
+from urllib.parse import quote
 
-from flask import Flask, jsonify, request, send_file
+from flask import Flask, Response, abort, jsonify, request, send_file, stream_with_context
 
 from . import db
-from .auth import require_role
-from .storage import save_upload, absolute_from_rel, package_version, delete_asset_storage, delete_version_storage
+from .auth import reload_keys, require_role
+from .storage import reserve_upload_path, recreate_dir, finalize_upload, absolute_from_rel, package_version, delete_asset_storage, delete_version_storage
 
 app = Flask(__name__)
+# Upper bound for multipart uploads (bytes); unset means unlimited
+app.config["MAX_CONTENT_LENGTH"] = int(os.environ.get("WEB_SERVER_MAX_UPLOAD", "0")) or None
+
+# Rotate API keys without a restart: kill -HUP <pid>
+if hasattr(signal, "SIGHUP"):
+    try:
+        signal.signal(signal.SIGHUP, lambda signum, frame: reload_keys())
+    except ValueError:
+        # Not the main thread (e.g. imported by a threaded server); reload_keys() still works
+        pass
+
+_ZIP_CHUNK = 1 << 20
+_UPLOAD_CHUNK = 1 << 20
+
+_STATS_TTL = 0.25
+_stats_cache = (float("-inf"), b"")
+
+_UI_PATH = os.path.join(os.path.dirname(__file__), "static_index.html")
+
+# Already-compressed or packed binary formats; DEFLATE costs CPU for ~no gain
+_STORED_EXTS = frozenset({
+    "exr", "png", "jpg", "jpeg", "tx", "abc", "usdc", "usdz", "mb", "fbx",
+    "mp4", "mov", "zip", "7z",
+})
+
+
+class _ZipStream:
+    """Write-only sink for zipfile; the response generator drains it as it fills."""
+
+    def __init__(self):
+        self._chunks = deque()
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        while self._chunks:
+            yield self._chunks.popleft()
+
+
+def _set_attachment(resp: Response, download_name: str):
+    """Content-Disposition the way send_file builds it: quoted filename, plus an RFC 5987
+    filename* when the name isn't ASCII (headers are latin-1 on the wire)."""
+    try:
+        download_name.encode("ascii")
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize("NFKD", download_name).encode("ascii", "ignore").decode("ascii")
+        names = {"filename": simple, "filename*": "UTF-8''" + quote(download_name, safe="!#$&+^`|~")}
+    else:
+        names = {"filename": download_name}
+    resp.headers.set("Content-Disposition", "attachment", **names)
+
+
+def _zip_info(src, arc_name: str) -> zipfile.ZipInfo:
+    """ZipInfo for an already-open file, using fstat instead of another path lookup."""
+    st = os.fstat(src.fileno())
+    date_time = time.localtime(st.st_mtime)[:6]
+    if date_time[0] < 1980:
+        date_time = (1980, 1, 1, 0, 0, 0)
+    zinfo = zipfile.ZipInfo(arc_name, date_time)
+    zinfo.external_attr = (st.st_mode & 0xFFFF) << 16
+    zinfo.file_size = st.st_size
+    ext = os.path.splitext(arc_name)[1].lstrip(".").lower()
+    zinfo.compress_type = zipfile.ZIP_STORED if ext in _STORED_EXTS else zipfile.ZIP_DEFLATED
+    return zinfo
+
+
+def _payload(max_bytes: int = 64 * 1024) -> Dict[str, Any]:
+    """JSON object body of a metadata request, parsed once; oversized bodies get a 413."""
+    if (request.content_length or 0) > max_bytes:
+        abort(413)
+    data = request.get_json(silent=True)
+    return data if isinstance(data, dict) else {}
+
+
+def _tags_str(tags: Any) -> str:
+    """Tags arrive as a list or an already-joined string; store them comma-joined."""
+    if isinstance(tags, list):
+        return ",".join(tags)
+    return tags or ""
 
 
 @app.get("/api/stats")
 def stats():
-    return jsonify({
-        "ok": True,
-        "time": datetime.utcnow().isoformat(),
-        "version": "2.0.0"
-    })
+    # Health checks hit this constantly; re-render the body at most every _STATS_TTL
+    global _stats_cache
+    now = time.monotonic()
+    stamp, body = _stats_cache
+    if now - stamp > _STATS_TTL:
+        body = json.dumps({
+            "ok": True,
+            "time": datetime.utcnow().isoformat(),
+            "version": "2.0.0"
+        }).encode()
+        _stats_cache = (now, body)
+    return app.response_class(body, mimetype="application/json")
 
 
 # ---- Asset create/upsert from integrate_web_pipeline ----
 @app.post("/api/assets")
 @require_role("editor")
 def upsert_asset():
-    payload = request.get_json(force=True, silent=True) or {}
-    asset_id = payload.get("asset_id") or ""
-    name = payload.get("name") or asset_id
-    family = (payload.get("family") or "unknown").lower()
-    description = payload.get("description") or ""
-    tags = ",".join(payload.get("tags", [])) if isinstance(payload.get("tags"), list) else payload.get("tags", "")
-    metadata = payload.get("metadata") or {}
-
+    # Version metadata can carry publish details; allow more than the small-body default
+    payload = _payload(max_bytes=1 << 20)
+    g = payload.get
+    asset_id = g("asset_id") or ""
     if not asset_id:
         return jsonify({"error": "asset_id required"}), 400
 
     # Persist asset + latest version pointer (we use timestamp as version if not provided)
-    version = int(payload.get("version") or 1)
-
-    db.ensure_asset(asset_id, name, family, description, tags)
-    db.upsert_version(asset_id, version, metadata)
+    version = int(g("version") or 1)
+    db.upsert_asset_and_version(
+        asset_id,
+        g("name") or asset_id,
+        (g("family") or "unknown").lower(),
+        g("description") or "",
+        _tags_str(g("tags")),
+        version,
+        g("metadata") or {},
+    )
 
     return jsonify({"asset_id": asset_id, "version": version})
 
 
+def _remove_quiet(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
 # Upload single file (multipart)
 @app.post("/api/upload")
 @require_role("editor")
 def upload_file():
     if "file" not in request.files:
         return jsonify({"error": "file field missing"}), 400
-    file = request.files["file"]
     asset_id = request.form.get("asset_id", "")
     version = int(request.form.get("version", "1") or 1)
     family = request.form.get("family", "")
     if not asset_id:
         return jsonify({"error": "asset_id required"}), 400
 
-    # Save to temp then move under storage_root
-    tmp_dir = os.path.join(os.path.dirname(__file__), "_tmp")
-    os.makedirs(tmp_dir, exist_ok=True)
-    tmp_path = os.path.join(tmp_dir, file.filename)
-    file.save(tmp_path)
-
-    rel_path, size = save_upload(asset_id, version, tmp_path, file.filename)
-    ext = os.path.splitext(file.filename)[1].lstrip(".").lower()
-    db.add_file(asset_id, version, file.filename, rel_path, ext, size)
+    files = request.files.getlist("file")
+    # X-Content-Hash describes a single file; skip the write when that exact content is already stored
+    digest = request.headers.get("X-Content-Hash") if len(files) == 1 else None
+    if digest:
+        stored = db.find_identical_file(asset_id, version, files[0].filename, digest)
+        if stored is not None and os.path.isfile(absolute_from_rel(stored)):
+            return jsonify({"ok": True, "asset_id": asset_id, "version": version,
+                            "rel_path": stored, "rel_paths": [stored], "unchanged": True})
+
+    # Several "file" parts may be sent at once; their rows are recorded in one transaction
+    rows = []
+    # Files this request added (not overwrote); removed again if the request fails
+    created = []
+    try:
+        for file in files:
+            # Write straight into storage_root; the .part suffix hides incomplete uploads
+            abs_path, rel_path = reserve_upload_path(asset_id, version, file.filename)
+            part_path = abs_path + ".part"
+            try:
+                out = open(part_path, "wb")
+            except FileNotFoundError:
+                # Cached version folder was deleted by another process; make it again
+                recreate_dir(os.path.dirname(abs_path))
+                out = open(part_path, "wb")
+            try:
+                with out:
+                    shutil.copyfileobj(file.stream, out, _UPLOAD_CHUNK)
+                is_new = not os.path.exists(abs_path)
+                size = finalize_upload(part_path, abs_path)
+            except Exception:
+                # e.g. the client aborted mid-stream; don't leave the partial file behind
+                _remove_quiet(part_path)
+                raise
+            if is_new:
+                created.append(abs_path)
+            ext = os.path.splitext(file.filename)[1].lstrip(".").lower()
+            rows.append((file.filename, rel_path, ext, size, digest))
+    except Exception:
+        # Earlier parts are already in place but have no rows yet
+        for path in created:
+            _remove_quiet(path)
+        raise
+    try:
+        db.add_files_bulk(asset_id, version, rows)
+    except sqlite3.IntegrityError:
+        # files.asset_id must reference an existing asset; don't keep unreferenced uploads
+        for r in rows:
+            _remove_quiet(absolute_from_rel(r[1]))
+        return jsonify({"error": "asset not found"}), 404
 
-    return jsonify({"ok": True, "asset_id": asset_id, "version": version, "rel_path": rel_path})
+    rel_paths = [r[1] for r in rows]
+    return jsonify({"ok": True, "asset_id": asset_id, "version": version,
+                    "rel_path": rel_paths[0], "rel_paths": rel_paths})
 
 
 # ---- Query/list ----
@@ -98,55 +245,71 @@ def list_assets():
 @app.get("/api/assets/<asset_id>")
 @require_role("viewer")
 def asset_detail(asset_id: str):
-    a = db.get_asset(asset_id)
-    if not a:
+    body = db.get_asset_json(asset_id)
+    if body is None:
         return jsonify({"error": "not found"}), 404
-    return jsonify(a)
+    return app.response_class(body, mimetype="application/json")
 
 
 @app.get("/api/assets/<asset_id>/download")
 def download_file(asset_id: str):
     version = int(request.args.get("version", "1") or 1)
     fmt = (request.args.get("format") or "").lower().lstrip(".")
-    a = db.get_asset(asset_id)
-    if not a:
+    rows = db.list_files(asset_id, version, fmt or None)
+    if rows:
+        f = rows[0]
+        abs_path = absolute_from_rel(f["rel_path"])
+        return send_file(abs_path, as_attachment=True, download_name=f["filename"])
+    if not db.get_asset_info(asset_id):
         return jsonify({"error": "not found"}), 404
-    # Pick first file of requested format
-    for f in a.get("files", []):
-        if f["version"] == version and (fmt == "" or f["format"] == fmt):
-            abs_path = absolute_from_rel(f["rel_path"])
-            return send_file(abs_path, as_attachment=True, download_name=f["filename"])
     return jsonify({"error": "file not found for version/format"}), 404
 
 
 @app.get("/api/assets/<asset_id>/package")
 def download_package(asset_id: str):
     version = int(request.args.get("version", "1") or 1)
-    a = db.get_asset(asset_id)
+    a = db.get_asset_info(asset_id)
     if not a:
         return jsonify({"error": "not found"}), 404
 
-    # Build zip in memory
-    mem = io.BytesIO()
-    with zipfile.ZipFile(mem, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
-        meta = {"asset": {k: a[k] for k in ("id", "name", "family", "description", "tags", "status")},
-                "version": version}
-        zf.writestr("metadata.json", json.dumps(meta, indent=2))
-        for f in a.get("files", []):
-            if f["version"] == version:
+    meta = {"asset": {k: a[k] for k in ("id", "name", "family", "description", "tags", "status")},
+            "version": version}
+    files = db.list_files(asset_id, version)
+
+    def generate():
+        # Stream the zip as it is built; only one chunk is held in memory at a time
+        sink = _ZipStream()
+        with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("metadata.json", json.dumps(meta, indent=2))
+            yield from sink.drain()
+            for f in files:
                 abs_path = absolute_from_rel(f["rel_path"])
                 arc_name = os.path.join("files", f["filename"])
-                if os.path.exists(abs_path):
-                    zf.write(abs_path, arc_name)
-    mem.seek(0)
-    return send_file(mem, as_attachment=True, download_name=f"{asset_id}_v{version}.zip")
+                # Just try the open; missing files are skipped without a separate exists() probe
+                try:
+                    src = open(abs_path, "rb")
+                except OSError:
+                    continue
+                with src, zf.open(_zip_info(src, arc_name), "w") as dst:
+                    while True:
+                        chunk = src.read(_ZIP_CHUNK)
+                        if not chunk:
+                            break
+                        dst.write(chunk)
+                        yield from sink.drain()
+                yield from sink.drain()
+        yield from sink.drain()
+
+    resp = Response(stream_with_context(generate()), mimetype="application/zip")
+    _set_attachment(resp, f"{asset_id}_v{version}.zip")
+    return resp
 
 
 # ---- Edit metadata / status / comments ----
 @app.patch("/api/assets/<asset_id>")
 @require_role("editor")
 def update_asset(asset_id: str):
-    fields = (request.get_json(silent=True) or {})
+    fields = _payload()
     db.update_asset(asset_id, fields)
     return jsonify({"ok": True})
 
@@ -154,17 +317,20 @@ def update_asset(asset_id: str):
 @app.post("/api/assets/<asset_id>/comment")
 @require_role("viewer")
 def add_comment(asset_id: str):
-    payload = request.get_json(force=True, silent=True) or {}
+    payload = _payload()
     author = payload.get("author", "anonymous")
     body = payload.get("body", "")
-    db.add_comment(asset_id, author, body)
+    try:
+        db.add_comment(asset_id, author, body)
+    except sqlite3.IntegrityError:
+        return jsonify({"error": "not found"}), 404
     return jsonify({"ok": True})
 
 
 @app.post("/api/assets/<asset_id>/status")
 @require_role("editor")
 def set_status(asset_id: str):
-    payload = request.get_json(force=True, silent=True) or {}
+    payload = _payload()
     status = payload.get("status", "published")
     db.update_asset(asset_id, {"status": status})
     return jsonify({"ok": True})
@@ -200,8 +366,13 @@ def delete_asset_endpoint(asset_id: str):
 @require_role("viewer")
 def list_changes():
     since = request.args.get("since")
-    items = db.list_changes(since)
-    return jsonify({"items": items})
+    # Pass both since and since_id (the last item's created_at and id) to page without gaps
+    since_id = request.args.get("since_id", type=int)
+    items = db.list_changes(since, since_id=since_id)
+    # ETag lets polling clients (scripts/sync_agent.py) get a bodyless 304 when idle
+    resp = jsonify({"items": items})
+    resp.add_etag()
+    return resp.make_conditional(request)
 
 
 # ---- Front page (very simple) ----
@@ -214,13 +385,13 @@ def home():
 
 @app.get("/ui")
 def ui():
-    # Serve simple static index to browse assets
-    path = os.path.join(os.path.dirname(__file__), "static_index.html")
-    if os.path.exists(path):
-        with open(path, "rb") as f:
-            data = f.read()
-        return app.response_class(data, mimetype="text/html")
-    return jsonify({"error": "ui not found"}), 404
+    # Serve simple static index to browse assets; conditional so reloads get a 304.
+    # no-cache makes browsers revalidate every time instead of guessing a lifetime from Last-Modified.
+    if not os.path.exists(_UI_PATH):
+        return jsonify({"error": "ui not found"}), 404
+    resp = send_file(_UI_PATH, mimetype="text/html", conditional=True)
+    resp.cache_control.no_cache = True
+    return resp
 
 
 if __name__ == "__main__":
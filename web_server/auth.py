@@ -1,6 +1,7 @@
 """
 Very small API key based auth + roles.
-- Configure keys via environment or local json file web_server/api_keys.json
+- Configure keys via local json file web_server/api_keys.json and/or the
+  WEB_API_KEYS env var (JSON object); loaded at startup, see reload_keys()
 - Header: X-API-Key
 Roles: viewer, editor, admin
 """
@@ -9,7 +10,7 @@ import os
 import json
 from functools import wraps
 from typing import Dict
-from flask import request, jsonify
+from flask import Response, request
 
 DEFAULT_KEYS = {
     "demo-view": "viewer",
@@ -20,34 +21,63 @@ DEFAULT_KEYS = {
 KEY_FILE = os.path.join(os.path.dirname(__file__), "api_keys.json")
 
 
-def load_keys() -> Dict[str, str]:
+_ROLE_RANK = {"viewer": 1, "editor": 2, "admin": 3}
+
+# Error bodies encoded once; a fresh Response wraps them per request
+_UNAUTH_BODY = json.dumps({"error": "Unauthorized"}).encode()
+_FORBIDDEN_BODY = json.dumps({"error": "Forbidden"}).encode()
+
+def _read_keys() -> Dict[str, str]:
+    """KEY_FILE (or DEFAULT_KEYS) overlaid with the WEB_API_KEYS env JSON mapping."""
+    keys = DEFAULT_KEYS.copy()
     if os.path.exists(KEY_FILE):
         try:
             with open(KEY_FILE, "r") as f:
                 data = json.load(f)
                 if isinstance(data, dict):
-                    return {str(k): str(v) for k, v in data.items()}
+                    keys = {str(k): str(v) for k, v in data.items()}
         except Exception:
             pass
-    return DEFAULT_KEYS.copy()
+    env = os.environ.get("WEB_API_KEYS")
+    if env:
+        try:
+            data = json.loads(env)
+            if isinstance(data, dict):
+                keys.update((str(k), str(v)) for k, v in data.items())
+        except ValueError:
+            pass
+    return keys
+
+
+def reload_keys() -> Dict[str, str]:
+    """Re-read keys from disk/env; call after rotating api_keys.json."""
+    global _KEYS
+    # Single rebinding; requests in flight keep whichever mapping they already read
+    _KEYS = _read_keys()
+    return _KEYS
+
+
+def load_keys() -> Dict[str, str]:
+    """Return the key -> role mapping loaded at startup. Shared; do not mutate it."""
+    return _KEYS
+
+
+_KEYS: Dict[str, str] = _read_keys()
 
 
 def require_role(min_role: str = "viewer"):
-    role_rank = {"viewer": 1, "editor": 2, "admin": 3}
+    min_rank = _ROLE_RANK.get(min_role, 1)
 
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
-            api_key = request.headers.get("X-API-Key", "")
-            keys = load_keys()
-            role = keys.get(api_key)
+            role = load_keys().get(request.headers.get("X-API-Key", ""))
             if not role:
-                return jsonify({"error": "Unauthorized"}), 401
-            if role_rank.get(role, 0) < role_rank.get(min_role, 1):
-                return jsonify({"error": "Forbidden"}), 403
+                return Response(_UNAUTH_BODY, 401, mimetype="application/json")
+            if _ROLE_RANK.get(role, 0) < min_rank:
+                return Response(_FORBIDDEN_BODY, 403, mimetype="application/json")
             # attach role for downstream if needed
             request.user_role = role  # type: ignore
             return func(*args, **kwargs)
         return wrapper
     return decorator
-
@@ -1,82 +1,182 @@
 """
 Lightweight SQLite helper for Web Asset Server.
-- Standard library only (sqlite3), no ORM.
+- Standard library only (sqlite3), no ORM; orjson is used for JSON columns when installed.
 - Provides CRUD utilities for assets, versions, files, comments and change log.
 
-Schema (simplified):
+Schema (simplified; "-> assets" = REFERENCES assets(id) ON DELETE CASCADE):
 - assets(id TEXT PRIMARY KEY, name TEXT, family TEXT, description TEXT,
          tags TEXT, status TEXT, created_at TEXT, updated_at TEXT)
-- versions(id INTEGER PRIMARY KEY AUTOINCREMENT, asset_id TEXT, version INTEGER,
+- versions(id INTEGER PRIMARY KEY AUTOINCREMENT, asset_id TEXT -> assets, version INTEGER,
            metadata_json TEXT, thumbnail_path TEXT, archived INTEGER DEFAULT 0,
            created_at TEXT, updated_at TEXT,
            UNIQUE(asset_id, version))
-- files(id INTEGER PRIMARY KEY AUTOINCREMENT, asset_id TEXT, version INTEGER,
-        filename TEXT, rel_path TEXT, format TEXT, size_bytes INTEGER)
-- comments(id INTEGER PRIMARY KEY AUTOINCREMENT, asset_id TEXT, author TEXT,
+- files(id INTEGER PRIMARY KEY AUTOINCREMENT, asset_id TEXT -> assets, version INTEGER,
+        filename TEXT, rel_path TEXT, format TEXT, size_bytes INTEGER, content_hash TEXT)
+- comments(id INTEGER PRIMARY KEY AUTOINCREMENT, asset_id TEXT -> assets, author TEXT,
           body TEXT, created_at TEXT)
 - changes(id INTEGER PRIMARY KEY AUTOINCREMENT, change_type TEXT, asset_id TEXT,
           payload_json TEXT, created_at TEXT)
 """
 from __future__ import annotations
+import atexit
 import sqlite3
 import json
 import os
+import queue
+import threading
 from contextlib import contextmanager
 from datetime import datetime
+from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
+# Optional orjson for the small payload/metadata encodes on every write
+try:
+    import orjson  # type: ignore
+    HAVE_ORJSON = True
+except Exception:
+    HAVE_ORJSON = False
+
+
+def _dumps(obj: Any) -> str:
+    """Compact JSON text for TEXT columns (orjson returns bytes, so decode to keep them TEXT)."""
+    if HAVE_ORJSON:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def _loads(text: Optional[str]) -> Any:
+    if not text:
+        return {}
+    return orjson.loads(text) if HAVE_ORJSON else json.loads(text)
+
+
 DB_FILE = os.path.join(os.path.dirname(__file__), "asset_server.sqlite3")
 
 
 def utcnow() -> str:
+    # Keep microseconds: list_changes pages with created_at > since, so second-resolution
+    # stamps would drop changes made within the same second.
     return datetime.utcnow().isoformat()
 
 
+# Applied once per connection. synchronous=NORMAL is durable enough under WAL
+# (only the last commits can be lost on power failure, never corruption).
+_PRAGMAS = """
+PRAGMA busy_timeout=5000;
+PRAGMA synchronous=NORMAL;
+PRAGMA cache_size=-64000;
+PRAGMA mmap_size=268435456;
+PRAGMA temp_store=MEMORY;
+PRAGMA foreign_keys=ON;
+"""
+
+
+def _connect(readonly: bool = False) -> sqlite3.Connection:
+    # check_same_thread=False is required, not a leftover: pooled connections are handed
+    # between request threads. Each one is only ever used by one thread at a time (writer
+    # lock / reader queue), and skipping the owner-thread check is the cheaper path anyway.
+    if readonly:
+        uri = Path(DB_FILE).resolve().as_uri() + "?mode=ro"
+        con = sqlite3.connect(uri, uri=True, timeout=10, check_same_thread=False, cached_statements=256)
+        # Row is built in C and converts straight to a dict; index access keeps working
+        con.row_factory = sqlite3.Row
+    else:
+        # Autocommit mode: conn_rw issues BEGIN IMMEDIATE/COMMIT itself
+        con = sqlite3.connect(DB_FILE, timeout=10, check_same_thread=False, cached_statements=256,
+                              isolation_level=None)
+        con.execute("PRAGMA journal_mode=WAL;")
+        con.execute("PRAGMA journal_size_limit=67108864;")
+    con.executescript(_PRAGMAS)
+    return con
+
+
+class _Pool:
+    """One shared writer (serialised by a lock) and up to `size` read-only connections.
+    Connections are opened lazily and reused, so PRAGMAs and prepared statements persist.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.writer: Optional[sqlite3.Connection] = None
+        self.writer_lock = threading.Lock()
+        # change-log rows queued by the current conn_rw block, flushed in one executemany
+        self.pending: List[Tuple[str, str, str, str]] = []
+        self.readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._opened = 0
+        self._open_lock = threading.Lock()
+
+    def get_reader(self) -> sqlite3.Connection:
+        try:
+            return self.readers.get_nowait()
+        except queue.Empty:
+            pass
+        with self._open_lock:
+            if self._opened < self.size:
+                self._opened += 1
+                return _connect(readonly=True)
+        return self.readers.get()
+
+
+_pool = _Pool(int(os.environ.get("WEB_DB_READERS", "4")))
+
+_CHANGE_SQL = "INSERT INTO changes(change_type, asset_id, payload_json, created_at) VALUES(?,?,?,?)"
+
+
+def _writer() -> sqlite3.Connection:
+    """The shared writer connection; the caller must hold _pool.writer_lock."""
+    if _pool.writer is None:
+        _pool.writer = _connect()
+    return _pool.writer
+
+
 @contextmanager
 def conn_rw():
-    con = sqlite3.connect(DB_FILE, timeout=10, check_same_thread=False)
-    try:
-        con.execute("PRAGMA journal_mode=WAL;")
-        con.execute("PRAGMA busy_timeout=5000;")
-        yield con
-        con.commit()
-    finally:
-        con.close()
+    with _pool.writer_lock:
+        con = _writer()
+        pending = _pool.pending
+        # Take the write lock up front so the transaction never has to upgrade mid-way
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            yield con
+            if pending:
+                con.executemany(_CHANGE_SQL, pending)
+            con.execute("COMMIT")
+        except BaseException:
+            # A failed COMMIT (e.g. SQLITE_BUSY) can leave the transaction open on the shared writer
+            if con.in_transaction:
+                con.execute("ROLLBACK")
+            raise
+        finally:
+            pending.clear()
+
+
+def _queue_change(change_type: str, asset_id: str, payload: Dict[str, Any]):
+    """Queue a change-log row; conn_rw writes it with the rest of the transaction.
+    Only call inside a conn_rw block (the writer lock guards the queue).
+    Each row is stamped here rather than sharing the caller's `now` (see utcnow).
+    """
+    _pool.pending.append((change_type, asset_id, _dumps(payload), utcnow()))
 
 
 @contextmanager
 def conn_ro():
-    con = sqlite3.connect(DB_FILE, timeout=10, check_same_thread=False)
+    con = _pool.get_reader()
     try:
-        con.execute("PRAGMA journal_mode=WAL;")
-        con.execute("PRAGMA busy_timeout=5000;")
         yield con
     finally:
-        con.close()
+        # End any implicit read snapshot so the next borrower sees fresh data
+        if con.in_transaction:
+            con.rollback()
+        _pool.readers.put(con)
 
 
-def init_db():
-    with conn_rw() as con:
-        cur = con.cursor()
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS assets (
-              id TEXT PRIMARY KEY,
-              name TEXT,
-              family TEXT,
-              description TEXT,
-              tags TEXT,
-              status TEXT,
-              created_at TEXT,
-              updated_at TEXT
-            );
-            """
-        )
-        cur.execute(
-            """
+# Child tables reference assets(id) so deleting an asset cascades inside SQLite.
+# Kept as constants because _migrate_foreign_keys rebuilds pre-FK tables from them.
+_CHILD_TABLES = {
+    "versions": """
             CREATE TABLE IF NOT EXISTS versions (
               id INTEGER PRIMARY KEY AUTOINCREMENT,
-              asset_id TEXT,
+              asset_id TEXT REFERENCES assets(id) ON DELETE CASCADE,
               version INTEGER,
               metadata_json TEXT,
               thumbnail_path TEXT,
@@ -85,34 +185,72 @@ def init_db():
               updated_at TEXT,
               UNIQUE(asset_id, version)
             );
-            """
-        )
-        cur.execute(
-            """
+            """,
+    "files": """
             CREATE TABLE IF NOT EXISTS files (
               id INTEGER PRIMARY KEY AUTOINCREMENT,
-              asset_id TEXT,
+              asset_id TEXT REFERENCES assets(id) ON DELETE CASCADE,
               version INTEGER,
               filename TEXT,
               rel_path TEXT,
               format TEXT,
-              size_bytes INTEGER
+              size_bytes INTEGER,
+              content_hash TEXT
             );
-            """
-        )
-        cur.execute(
-            """
+            """,
+    "comments": """
             CREATE TABLE IF NOT EXISTS comments (
               id INTEGER PRIMARY KEY AUTOINCREMENT,
-              asset_id TEXT,
+              asset_id TEXT REFERENCES assets(id) ON DELETE CASCADE,
               author TEXT,
               body TEXT,
               created_at TEXT
             );
-            """
-        )
-        cur.execute(
-            """
+            """,
+}
+
+
+def _migrate_foreign_keys():
+    """Rebuild child tables created before they had ON DELETE CASCADE.
+    SQLite can't add a foreign key in place; this is its documented copy-and-rename
+    procedure, on a private connection with enforcement off so existing orphan rows survive.
+    """
+    con = sqlite3.connect(DB_FILE, timeout=10, isolation_level=None)
+    try:
+        con.execute("PRAGMA foreign_keys=OFF")
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            # Checked inside the write transaction so two booting workers can't both rebuild
+            stale = [t for t in _CHILD_TABLES if not con.execute(f"PRAGMA foreign_key_list({t})").fetchall()]
+            for t in stale:
+                cols = ", ".join(r[1] for r in con.execute(f"PRAGMA table_info({t})"))
+                con.execute(f"ALTER TABLE {t} RENAME TO _{t}_old")
+                con.execute(_CHILD_TABLES[t])
+                con.execute(f"INSERT INTO {t}({cols}) SELECT {cols} FROM _{t}_old")
+                con.execute(f"DROP TABLE _{t}_old")
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+    finally:
+        con.close()
+
+
+# Bump when the DDL below changes; init_db is a no-op once the file is at this version
+_SCHEMA_VERSION = 2
+
+_TABLES_SQL = """
+            CREATE TABLE IF NOT EXISTS assets (
+              id TEXT PRIMARY KEY,
+              name TEXT,
+              family TEXT,
+              description TEXT,
+              tags TEXT,
+              status TEXT,
+              created_at TEXT,
+              updated_at TEXT
+            );
+""" + "".join(_CHILD_TABLES.values()) + """
             CREATE TABLE IF NOT EXISTS changes (
               id INTEGER PRIMARY KEY AUTOINCREMENT,
               change_type TEXT,
@@ -120,50 +258,94 @@ def init_db():
               payload_json TEXT,
               created_at TEXT
             );
-            """
-        )
+"""
+
+# versions(asset_id, version) is already covered by its UNIQUE constraint's index
+_INDEXES_SQL = """
+CREATE INDEX IF NOT EXISTS idx_files_asset_version_format ON files(asset_id, version, format);
+CREATE INDEX IF NOT EXISTS idx_changes_created ON changes(created_at);
+CREATE INDEX IF NOT EXISTS idx_comments_asset ON comments(asset_id);
+"""
+
+
+def _run_script(con: sqlite3.Connection, script: str):
+    """Run a DDL script as one IMMEDIATE transaction in a single executescript call."""
+    try:
+        con.executescript("BEGIN IMMEDIATE;" + script + "COMMIT;")
+    except BaseException:
+        if con.in_transaction:
+            con.execute("ROLLBACK")
+        raise
+
+
+def _add_missing_columns(con: sqlite3.Connection):
+    """Add columns introduced after a table was first created (files.content_hash, schema 2)."""
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        # Checked inside the write transaction so two booting workers can't both ALTER
+        cols = {r[1] for r in con.execute("PRAGMA table_info(files)")}
+        if "content_hash" not in cols:
+            con.execute("ALTER TABLE files ADD COLUMN content_hash TEXT")
+        con.execute("COMMIT")
+    except BaseException:
+        if con.in_transaction:
+            con.execute("ROLLBACK")
+        raise
+
+
+def init_db():
+    with _pool.writer_lock:
+        con = _writer()
+        if con.execute("PRAGMA user_version").fetchone()[0] >= _SCHEMA_VERSION:
+            return
+        _run_script(con, _TABLES_SQL)
+        _migrate_foreign_keys()
+        _add_missing_columns(con)
+        _run_script(con, _INDEXES_SQL + f"PRAGMA user_version={_SCHEMA_VERSION};")
+
+
+def _ensure_asset(cur: sqlite3.Cursor, asset_id: str, name: str, family: str, description: str, tags: str, now: str):
+    # Existing assets only get name/family/updated_at refreshed
+    cur.execute(
+        "INSERT INTO assets(id, name, family, description, tags, status, created_at, updated_at)"
+        " VALUES(?,?,?,?,?,?,?,?)"
+        " ON CONFLICT(id) DO UPDATE SET name=excluded.name, family=excluded.family, updated_at=excluded.updated_at",
+        (asset_id, name, family, description, tags, "published", now, now),
+    )
+    _queue_change("asset_upsert", asset_id, {"name": name, "family": family})
+
+
+def _upsert_version(cur: sqlite3.Cursor, asset_id: str, version: int, metadata: Dict[str, Any], thumbnail_path: str, now: str):
+    cur.execute(
+        "INSERT INTO versions(asset_id, version, metadata_json, thumbnail_path, archived, created_at, updated_at)"
+        " VALUES(?,?,?,?,0,?,?)"
+        " ON CONFLICT(asset_id, version) DO UPDATE SET metadata_json=excluded.metadata_json,"
+        " thumbnail_path=excluded.thumbnail_path, updated_at=excluded.updated_at",
+        (asset_id, version, _dumps(metadata), thumbnail_path, now, now),
+    )
+    _queue_change("version_upsert", asset_id, {"version": version})
 
 
 def ensure_asset(asset_id: str, name: str, family: str, description: str = "", tags: str = ""):
     now = utcnow()
     with conn_rw() as con:
-        cur = con.cursor()
-        cur.execute("SELECT id FROM assets WHERE id=?", (asset_id,))
-        if cur.fetchone():
-            cur.execute(
-                "UPDATE assets SET name=?, family=?, updated_at=? WHERE id=?",
-                (name, family, now, asset_id),
-            )
-        else:
-            cur.execute(
-                "INSERT INTO assets(id, name, family, description, tags, status, created_at, updated_at)"
-                " VALUES(?,?,?,?,?,?,?,?)",
-                (asset_id, name, family, description, tags, "published", now, now),
-            )
-        # inline change log to avoid nested write-locks
-        cur.execute(
-            "INSERT INTO changes(change_type, asset_id, payload_json, created_at) VALUES(?,?,?,?)",
-            ("asset_upsert", asset_id, json.dumps({"name": name, "family": family}), now),
-        )
+        _ensure_asset(con.cursor(), asset_id, name, family, description, tags, now)
 
 
 def upsert_version(asset_id: str, version: int, metadata: Dict[str, Any], thumbnail_path: str = ""):
+    now = utcnow()
+    with conn_rw() as con:
+        _upsert_version(con.cursor(), asset_id, version, metadata, thumbnail_path, now)
+
+
+def upsert_asset_and_version(asset_id: str, name: str, family: str, description: str, tags: str,
+                             version: int, metadata: Dict[str, Any], thumbnail_path: str = ""):
+    """ensure_asset + upsert_version on one connection, committed once."""
     now = utcnow()
     with conn_rw() as con:
         cur = con.cursor()
-        cur.execute(
-            "INSERT OR IGNORE INTO versions(asset_id, version, metadata_json, thumbnail_path, archived, created_at, updated_at)"
-            " VALUES(?,?,?,?,0,?,?)",
-            (asset_id, version, json.dumps(metadata), thumbnail_path, now, now),
-        )
-        cur.execute(
-            "UPDATE versions SET metadata_json=?, thumbnail_path=?, updated_at=? WHERE asset_id=? AND version=?",
-            (json.dumps(metadata), thumbnail_path, now, asset_id, version),
-        )
-        cur.execute(
-            "INSERT INTO changes(change_type, asset_id, payload_json, created_at) VALUES(?,?,?,?)",
-            ("version_upsert", asset_id, json.dumps({"version": version}), now),
-        )
+        _ensure_asset(cur, asset_id, name, family, description, tags, now)
+        _upsert_version(cur, asset_id, version, metadata, thumbnail_path, now)
 
 
 def add_file(asset_id: str, version: int, filename: str, rel_path: str, fmt: str, size_bytes: int):
@@ -173,64 +355,144 @@ def add_file(asset_id: str, version: int, filename: str, rel_path: str, fmt: str
             "INSERT INTO files(asset_id, version, filename, rel_path, format, size_bytes) VALUES(?,?,?,?,?,?)",
             (asset_id, version, filename, rel_path, fmt, size_bytes),
         )
-        cur.execute(
-            "INSERT INTO changes(change_type, asset_id, payload_json, created_at) VALUES(?,?,?,?)",
-            ("file_added", asset_id, json.dumps({"version": version, "filename": filename}), utcnow()),
+        _queue_change("file_added", asset_id, {"version": version, "filename": filename})
+
+
+def add_files_bulk(asset_id: str, version: int, rows: List[Tuple[str, str, str, int, Optional[str]]]):
+    """Insert many (filename, rel_path, fmt, size_bytes, content_hash) rows for one version in one transaction."""
+    with conn_rw() as con:
+        con.executemany(
+            "INSERT INTO files(asset_id, version, filename, rel_path, format, size_bytes, content_hash)"
+            " VALUES(?,?,?,?,?,?,?)",
+            [(asset_id, version, *r) for r in rows],
         )
+        for r in rows:
+            _queue_change("file_added", asset_id, {"version": version, "filename": r[0]})
+
+
+def _list_assets_sql(where: str) -> str:
+    return ("SELECT id, name, family, description, tags, status, created_at, updated_at FROM assets"
+            f"{where} ORDER BY updated_at DESC LIMIT ? OFFSET ?")
+
+
+# One fixed statement per (has_family, has_status) combination, built once at import
+_LIST_SQL = {
+    (False, False): _list_assets_sql(""),
+    (True, False): _list_assets_sql(" WHERE family = ?"),
+    (False, True): _list_assets_sql(" WHERE status = ?"),
+    (True, True): _list_assets_sql(" WHERE family = ? AND status = ?"),
+}
 
 
 def list_assets(filters: Dict[str, Any], limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
-    where = []
-    params: List[Any] = []
-    if fam := filters.get("family"):
-        where.append("family = ?")
-        params.append(fam)
-    if status := filters.get("status"):
-        where.append("status = ?")
-        params.append(status)
-    where_sql = (" WHERE " + " AND ".join(where)) if where else ""
-    order = " ORDER BY updated_at DESC"
-    sql = f"SELECT id, name, family, description, tags, status, created_at, updated_at FROM assets{where_sql}{order} LIMIT ? OFFSET ?"
+    fam = filters.get("family")
+    status = filters.get("status")
+    params = [p for p in (fam, status) if p]
     params.extend([limit, offset])
     with conn_ro() as con:
-        cur = con.cursor()
-        rows = cur.execute(sql, params).fetchall()
-    out = []
-    for r in rows:
-        out.append({
-            "id": r[0], "name": r[1], "family": r[2], "description": r[3],
-            "tags": r[4], "status": r[5], "created_at": r[6], "updated_at": r[7]
-        })
-    return out
+        return [dict(r) for r in con.execute(_LIST_SQL[(bool(fam), bool(status))], params)]
+
+
+# Asset, versions and files in one statement (one prepare, one snapshot). Column 0 tags
+# the row kind, column 1 orders within a kind; UNION ALL rather than a JOIN so files whose
+# version row is missing are still returned.
+_GET_ASSET_SQL = (
+    "SELECT 0 AS kind, 0 AS ord, id, name, family, description, tags, status, created_at, updated_at"
+    " FROM assets WHERE id=?"
+    " UNION ALL"
+    " SELECT 1, -version, version, metadata_json, thumbnail_path, archived, created_at, updated_at, NULL, NULL"
+    " FROM versions WHERE asset_id=?"
+    " UNION ALL"
+    " SELECT 2, id, version, filename, rel_path, format, size_bytes, NULL, NULL, NULL FROM files WHERE asset_id=?"
+    " ORDER BY 1, 2"
+)
 
 
 def get_asset(asset_id: str) -> Optional[Dict[str, Any]]:
     with conn_ro() as con:
-        cur = con.cursor()
-        a = cur.execute("SELECT id, name, family, description, tags, status, created_at, updated_at FROM assets WHERE id=?", (asset_id,)).fetchone()
-        if not a:
-            return None
-        versions = cur.execute(
-            "SELECT version, metadata_json, thumbnail_path, archived, created_at, updated_at FROM versions WHERE asset_id=? ORDER BY version DESC",
-            (asset_id,),
-        ).fetchall()
-        files = cur.execute(
-            "SELECT version, filename, rel_path, format, size_bytes FROM files WHERE asset_id=?",
-            (asset_id,),
-        ).fetchall()
-    v_list = [
-        {
-            "version": v[0], "metadata": json.loads(v[1] or "{}"), "thumbnail_path": v[2],
-            "archived": bool(v[3]), "created_at": v[4], "updated_at": v[5]
-        } for v in versions
-    ]
-    f_list = [
-        {"version": f[0], "filename": f[1], "rel_path": f[2], "format": f[3], "size_bytes": f[4]} for f in files
-    ]
-    return {
-        "id": a[0], "name": a[1], "family": a[2], "description": a[3], "tags": a[4], "status": a[5],
-        "created_at": a[6], "updated_at": a[7], "versions": v_list, "files": f_list
-    }
+        rows = con.execute(_GET_ASSET_SQL, (asset_id, asset_id, asset_id)).fetchall()
+    if not rows or rows[0]["kind"] != 0:
+        return None
+    asset = dict(rows[0])
+    del asset["kind"], asset["ord"]
+    # Version/file rows share the first SELECT's column names, so read those by position
+    v_list = []
+    f_list = []
+    for r in rows[1:]:
+        if r[0] == 1:
+            v_list.append({
+                "version": r[2], "metadata": _loads(r[3]), "thumbnail_path": r[4],
+                "archived": bool(r[5]), "created_at": r[6], "updated_at": r[7]
+            })
+        else:
+            f_list.append({"version": r[2], "filename": r[3], "rel_path": r[4], "format": r[5], "size_bytes": r[6]})
+    asset["versions"] = v_list
+    asset["files"] = f_list
+    return asset
+
+
+# Same document as get_asset(), assembled by SQLite's JSON1 functions so metadata_json is
+# spliced in as-is instead of being parsed into Python objects and re-encoded by the caller.
+_GET_ASSET_JSON_SQL = """
+SELECT json_object(
+  'id', a.id, 'name', a.name, 'family', a.family, 'description', a.description,
+  'tags', a.tags, 'status', a.status, 'created_at', a.created_at, 'updated_at', a.updated_at,
+  'versions', (SELECT json_group_array(json(x)) FROM (
+      SELECT json_object(
+        'version', v.version, 'metadata', json(COALESCE(NULLIF(v.metadata_json, ''), '{}')),
+        'thumbnail_path', v.thumbnail_path,
+        'archived', json(CASE WHEN v.archived THEN 'true' ELSE 'false' END),
+        'created_at', v.created_at, 'updated_at', v.updated_at) AS x
+      FROM versions v WHERE v.asset_id = a.id ORDER BY v.version DESC)),
+  'files', (SELECT json_group_array(json(x)) FROM (
+      SELECT json_object(
+        'version', f.version, 'filename', f.filename, 'rel_path', f.rel_path,
+        'format', f.format, 'size_bytes', f.size_bytes) AS x
+      FROM files f WHERE f.asset_id = a.id ORDER BY f.id))
+) FROM assets a WHERE a.id = ?
+"""
+
+
+def get_asset_json(asset_id: str) -> Optional[str]:
+    """get_asset() as a ready-to-send JSON string (None if the asset doesn't exist)."""
+    try:
+        with conn_ro() as con:
+            row = con.execute(_GET_ASSET_JSON_SQL, (asset_id,)).fetchone()
+    except sqlite3.OperationalError:
+        # SQLite built without JSON1; encode the Python-side document instead
+        a = get_asset(asset_id)
+        return None if a is None else _dumps(a)
+    return row[0] if row else None
+
+
+def get_asset_info(asset_id: str) -> Optional[Dict[str, Any]]:
+    """Asset row only, without the versions/files lists that get_asset joins in."""
+    with conn_ro() as con:
+        a = con.execute("SELECT id, name, family, description, tags, status, created_at, updated_at FROM assets WHERE id=?", (asset_id,)).fetchone()
+    return dict(a) if a else None
+
+
+def list_files(asset_id: str, version: int, fmt: Optional[str] = None) -> List[Dict[str, Any]]:
+    """File rows for one asset version, optionally narrowed to a single format."""
+    with conn_ro() as con:
+        return [dict(r) for r in con.execute(
+            "SELECT version, filename, rel_path, format, size_bytes FROM files"
+            " WHERE asset_id=? AND version=? AND (? IS NULL OR format=?) ORDER BY id",
+            (asset_id, version, fmt, fmt),
+        )]
+
+
+def find_identical_file(asset_id: str, version: int, filename: str, content_hash: str) -> Optional[str]:
+    """rel_path of the newest stored copy of filename in this version if its hash matches, else None."""
+    with conn_ro() as con:
+        row = con.execute(
+            "SELECT rel_path, content_hash FROM files WHERE asset_id=? AND version=? AND filename=?"
+            " ORDER BY id DESC LIMIT 1",
+            (asset_id, version, filename),
+        ).fetchone()
+    if row is None or row["content_hash"] != content_hash:
+        return None
+    return row["rel_path"]
 
 
 def update_asset(asset_id: str, fields: Dict[str, Any]):
@@ -249,34 +511,24 @@ def update_asset(asset_id: str, fields: Dict[str, Any]):
     sql = f"UPDATE assets SET {', '.join(sets)}, updated_at=? WHERE id=?"
     with conn_rw() as con:
         con.execute(sql, params)
-        con.execute(
-            "INSERT INTO changes(change_type, asset_id, payload_json, created_at) VALUES(?,?,?,?)",
-            ("asset_update", asset_id, json.dumps({k: v for k, v in fields.items() if k in allow}), now),
-        )
+        _queue_change("asset_update", asset_id, {k: v for k, v in fields.items() if k in allow})
 
 
 def archive_version(asset_id: str, version: int):
     now = utcnow()
     with conn_rw() as con:
         con.execute("UPDATE versions SET archived=1, updated_at=? WHERE asset_id=? AND version=?", (now, asset_id, version))
-        con.execute(
-            "INSERT INTO changes(change_type, asset_id, payload_json, created_at) VALUES(?,?,?,?)",
-            ("version_archived", asset_id, json.dumps({"version": version}), now),
-        )
+        _queue_change("version_archived", asset_id, {"version": version})
 
 
 
 def delete_version(asset_id: str, version: int):
     """Hard delete a specific version and its file rows."""
-    now = utcnow()
     with conn_rw() as con:
         cur = con.cursor()
         cur.execute("DELETE FROM files WHERE asset_id=? AND version=?", (asset_id, version))
         cur.execute("DELETE FROM versions WHERE asset_id=? AND version=?", (asset_id, version))
-        cur.execute(
-            "INSERT INTO changes(change_type, asset_id, payload_json, created_at) VALUES(?,?,?,?)",
-            ("version_deleted", asset_id, json.dumps({"version": version}), now),
-        )
+        _queue_change("version_deleted", asset_id, {"version": version})
 
 
 
@@ -284,44 +536,74 @@ def delete_asset(asset_id: str):
     """Hard delete an asset and all related rows.
     Note: Storage files are removed by storage layer; this only touches DB.
     """
-    now = utcnow()
     with conn_rw() as con:
-        cur = con.cursor()
-        cur.execute("DELETE FROM files WHERE asset_id=?", (asset_id,))
-        cur.execute("DELETE FROM versions WHERE asset_id=?", (asset_id,))
-        cur.execute("DELETE FROM comments WHERE asset_id=?", (asset_id,))
-        cur.execute("DELETE FROM assets WHERE id=?", (asset_id,))
-        cur.execute(
-            "INSERT INTO changes(change_type, asset_id, payload_json, created_at) VALUES(?,?,?,?)",
-            ("asset_deleted", asset_id, json.dumps({}), now),
-        )
+        # versions/files/comments go with it via ON DELETE CASCADE
+        con.execute("DELETE FROM assets WHERE id=?", (asset_id,))
+        _queue_change("asset_deleted", asset_id, {})
 
 
 def add_comment(asset_id: str, author: str, body: str):
     now = utcnow()
     with conn_rw() as con:
         con.execute("INSERT INTO comments(asset_id, author, body, created_at) VALUES(?,?,?,?)", (asset_id, author, body, now))
-        con.execute(
-            "INSERT INTO changes(change_type, asset_id, payload_json, created_at) VALUES(?,?,?,?)",
-            ("comment", asset_id, json.dumps({"author": author}), now),
-        )
+        _queue_change("comment", asset_id, {"author": author})
 
 
-def list_changes(since_iso: Optional[str], limit: int = 100) -> List[Dict[str, Any]]:
+def list_changes(since_iso: Optional[str], limit: int = 100, since_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Change rows after the cursor, oldest first. Rows are ordered by (created_at, id) and
+    since_id resumes within a created_at, so equal stamps split across pages aren't skipped.
+    """
+    cols = "SELECT id, change_type, asset_id, payload_json, created_at FROM changes"
     with conn_ro() as con:
-        cur = con.cursor()
-        if since_iso:
-            rows = cur.execute("SELECT change_type, asset_id, payload_json, created_at FROM changes WHERE created_at > ? ORDER BY created_at ASC LIMIT ?", (since_iso, limit)).fetchall()
+        if since_iso and since_id is not None:
+            # Row-value comparison still seeks idx_changes_created (the index carries the rowid)
+            cur = con.execute(cols + " WHERE (created_at, id) > (?, ?) ORDER BY created_at ASC, id ASC LIMIT ?",
+                              (since_iso, since_id, limit))
+        elif since_iso:
+            cur = con.execute(cols + " WHERE created_at > ? ORDER BY created_at ASC, id ASC LIMIT ?", (since_iso, limit))
         else:
-            rows = cur.execute("SELECT change_type, asset_id, payload_json, created_at FROM changes ORDER BY created_at ASC LIMIT ?", (limit,)).fetchall()
-    return [{"change_type": r[0], "asset_id": r[1], "payload": json.loads(r[2] or "{}"), "created_at": r[3]} for r in rows]
+            cur = con.execute(cols + " ORDER BY created_at ASC, id ASC LIMIT ?", (limit,))
+        return [{"id": r["id"], "change_type": r["change_type"], "asset_id": r["asset_id"],
+                 "payload": _loads(r["payload_json"]), "created_at": r["created_at"]} for r in cur]
+
+
+def maintain():
+    """Periodic upkeep for a cron/scheduler (e.g. every 15 min): refresh planner stats,
+    release free pages (only effective if the file uses auto_vacuum=INCREMENTAL) and
+    fold the WAL back into the main file so it doesn't keep growing.
+    """
+    with _pool.writer_lock:
+        con = _writer()
+        con.execute("PRAGMA optimize;")
+        con.execute("PRAGMA incremental_vacuum;")
+        con.execute("PRAGMA wal_checkpoint(TRUNCATE);")
+
+
+def _close_all():
+    """atexit hook: close pooled readers, then let SQLite update query-planner stats and
+    close the writer last so it can checkpoint and remove the WAL files.
+    """
+    while True:
+        try:
+            _pool.readers.get_nowait().close()
+        except queue.Empty:
+            break
+    with _pool.writer_lock:
+        if _pool.writer is not None:
+            try:
+                _pool.writer.execute("PRAGMA optimize;")
+            except sqlite3.Error:
+                pass
+            _pool.writer.close()
+            _pool.writer = None
 
 
 def log_change(change_type: str, asset_id: str, payload: Dict[str, Any]):
-    with conn_rw() as con:
-        con.execute("INSERT INTO changes(change_type, asset_id, payload_json, created_at) VALUES(?,?,?,?)", (change_type, asset_id, json.dumps(payload), utcnow()))
+    with conn_rw():
+        _queue_change(change_type, asset_id, payload)
 
 
 # Initialize DB on module import
 init_db()
+atexit.register(_close_all)
 
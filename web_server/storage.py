@@ -7,7 +7,9 @@ All paths are relative to this module directory by default.
 from __future__ import annotations
 import os
 import shutil
-from typing import Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Set, Tuple
 
 ROOT = os.path.join(os.path.dirname(__file__), "storage_root")
 ASSETS_DIR = os.path.join(ROOT, "assets")
@@ -17,24 +19,47 @@ for d in (ROOT, ASSETS_DIR, THUMBS_DIR):
     os.makedirs(d, exist_ok=True)
 
 
+# Version folders already created by this process; skips the makedirs syscalls on repeat uploads.
+# Upload threads add while deletes iterate, so mutations and iteration hold _ensured_lock.
+_ensured_dirs: Set[str] = set()
+_ensured_lock = threading.Lock()
+
+
 def asset_dir(asset_id: str, version: int) -> str:
     path = os.path.join(ASSETS_DIR, asset_id, f"v{int(version)}")
-    os.makedirs(path, exist_ok=True)
+    if path not in _ensured_dirs:
+        os.makedirs(path, exist_ok=True)
+        with _ensured_lock:
+            _ensured_dirs.add(path)
     return path
 
 
-def save_upload(asset_id: str, version: int, src_path: str, filename: str | None = None) -> Tuple[str, int]:
-    """Move uploaded temp file into asset storage location.
-    Returns (relative_path_for_db, size_bytes).
+def recreate_dir(path: str) -> None:
+    """Create a cached folder again after it was removed outside this process."""
+    os.makedirs(path, exist_ok=True)
+    with _ensured_lock:
+        _ensured_dirs.add(path)
+
+
+def _rel_path(asset_id: str, version: int, filename: str) -> str:
+    # Layout is fixed (see module docstring), so no need for os.path.relpath
+    return f"assets/{asset_id}/v{int(version)}/{filename}"
+
+
+def reserve_upload_path(asset_id: str, version: int, filename: str) -> Tuple[str, str]:
+    """Resolve where an upload will live so it can be written there directly.
+    Returns (absolute_path, relative_path_for_db).
     """
-    fname = filename or os.path.basename(src_path)
-    dst_dir = asset_dir(asset_id, version)
-    dst = os.path.join(dst_dir, fname)
-    os.makedirs(os.path.dirname(dst), exist_ok=True)
-    shutil.move(src_path, dst)
-    size = os.path.getsize(dst)
-    rel = os.path.relpath(dst, ROOT).replace("\\", "/")
-    return rel, size
+    dst = os.path.join(asset_dir(asset_id, version), filename)
+    return dst, _rel_path(asset_id, version, filename)
+
+
+def finalize_upload(part_path: str, dst: str) -> int:
+    """Rename a fully written upload into place (same directory, no copy).
+    Returns size_bytes.
+    """
+    os.replace(part_path, dst)
+    return os.stat(dst).st_size
 
 
 def absolute_from_rel(rel_path: str) -> str:
@@ -50,26 +75,51 @@ def package_version(asset_id: str, version: int) -> str:
 
 
 
+def _forget_dirs(prefix: str) -> None:
+    """Drop cached asset_dir entries under prefix once they are being deleted."""
+    head = prefix + os.sep
+    with _ensured_lock:
+        for path in [p for p in _ensured_dirs if p.startswith(head)]:
+            _ensured_dirs.discard(path)
+
+
+def _rmtree_quiet(path: str) -> None:
+    shutil.rmtree(path, ignore_errors=True)
+
+
 def delete_asset_storage(asset_id: str) -> None:
     """Remove all asset files and thumbnails for given asset_id."""
     # Remove asset directory
-    import glob
     asset_path = os.path.join(ASSETS_DIR, asset_id)
+    _forget_dirs(asset_path)
     if os.path.isdir(asset_path):
+        # Version folders are independent; unlink-bound, so remove them in parallel
+        with os.scandir(asset_path) as it:
+            subdirs = [e.path for e in it if e.is_dir(follow_symlinks=False)]
+        if len(subdirs) > 1:
+            with ThreadPoolExecutor(max_workers=min(8, len(subdirs))) as ex:
+                list(ex.map(_rmtree_quiet, subdirs))
         shutil.rmtree(asset_path, ignore_errors=True)
-    # Remove thumbnails
-    if os.path.isdir(THUMBS_DIR):
-        for p in glob.glob(os.path.join(THUMBS_DIR, f"{asset_id}_*")):
-            try:
-                os.remove(p)
-            except Exception:
-                pass
+    # Remove thumbnails: one directory read, plain prefix test, no glob/fnmatch
+    prefix = f"{asset_id}_"
+    try:
+        with os.scandir(THUMBS_DIR) as it:
+            for e in it:
+                if e.name.startswith(prefix):
+                    try:
+                        os.unlink(e.path)
+                    except OSError:
+                        pass
+    except FileNotFoundError:
+        pass
 
 
 
 def delete_version_storage(asset_id: str, version: int) -> None:
     """Remove a specific version directory and its thumbnail."""
     vdir = os.path.join(ASSETS_DIR, asset_id, f"v{int(version)}")
+    with _ensured_lock:
+        _ensured_dirs.discard(vdir)
     if os.path.isdir(vdir):
         shutil.rmtree(vdir, ignore_errors=True)
     thumb = os.path.join(THUMBS_DIR, f"{asset_id}_v{int(version)}.jpg")